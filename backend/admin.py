@@ -1,18 +1,19 @@
+from datetime import datetime
 from pathlib import Path
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import PlainTextResponse
-from database import Database
-from services.auth_service import authService, oauth2_scheme
-from config import Config
-import sqlite3
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from database import Database, records, encode_cursor, decode_cursor
+from services.auth_service import authService, token_payload
+from logger import LEVELS
+from services.log_service import log_service
 
 db_admin:Database = Database()
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-def get_current_admin(token: str = Depends(oauth2_scheme)):
-    payload = authService.decode_token(token)
+def get_current_admin(payload: dict = Depends(token_payload)):
     if payload["role"] != 2:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -20,45 +21,114 @@ def get_current_admin(token: str = Depends(oauth2_scheme)):
         )
     return payload
 
-@router.get("/dashboard-data")
-async def get_dashboard_data(admin = Depends(get_current_admin)):
-    
+DASHBOARD_PAGE_SIZE = 50
+
+def page_params(
+    limit: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=200),
+    after: str | None = Query(None, description="next_cursor of the previous page"),
+    order: Literal["asc", "desc"] = "asc",
+    search: str | None = Query(None, max_length=100)
+):
     try:
-        stats = {
-            "users": int(db_admin._returnDataframe(db_admin.queryExecution("SELECT COUNT(*) FROM Users")).iloc[0,0]),
-            "heatmaps": int(db_admin._returnDataframe(db_admin.queryExecution("SELECT COUNT(*) FROM Heatmaps")).iloc[0,0]),
-            "models": int(db_admin._returnDataframe(db_admin.queryExecution("SELECT COUNT(*) FROM Models")).iloc[0,0])
+        cursor = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"limit": limit, "after": cursor, "descending": order == "desc", "search": search or None}
+
+def page_response(rows, limit: int, sort: str) -> dict:
+    """Trims the look-ahead row fetched by the caller and derives the next cursor from the last item."""
+    if rows is None:
+        raise HTTPException(status_code=500, detail="Database query failed")
+    items = records(rows[:limit])
+    next_cursor = encode_cursor(items[-1][sort], items[-1]["id"]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/dashboard-data")
+def get_dashboard_data(admin = Depends(get_current_admin)):
+    counts = db_admin.getTableCounts()
+    if counts is None:
+        raise HTTPException(status_code=500, detail="Database query failed")
+    stats = {
+        "users": counts.get("Users", 0),
+        "heatmaps": counts.get("Heatmaps", 0),
+        "models": counts.get("Models", 0)
+    }
+
+    # Only the first page of each list; the rest is fetched through the paginated endpoints
+    users = page_response(db_admin.pageUsers(DASHBOARD_PAGE_SIZE + 1), DASHBOARD_PAGE_SIZE, "id")
+    heatmaps = page_response(db_admin.pageHeatmaps(DASHBOARD_PAGE_SIZE + 1), DASHBOARD_PAGE_SIZE, "id")
+    models = page_response(db_admin.pageModels(DASHBOARD_PAGE_SIZE + 1), DASHBOARD_PAGE_SIZE, "id")
+
+    return ORJSONResponse({
+        "stats": stats,
+        "users": users["items"],
+        "heatmaps": heatmaps["items"],
+        "models": models["items"],
+        "next": {
+            "users": users["next_cursor"],
+            "heatmaps": heatmaps["next_cursor"],
+            "models": models["next_cursor"]
         }
+    })
 
-        users = db_admin._returnDataframe(db_admin.queryExecution("""
-            SELECT u.id, u.email, u.role, COUNT(h.id) as sessions 
-            FROM Users u LEFT JOIN Heatmaps h ON u.id = h.user_id 
-            GROUP BY u.id
-        """)).to_dict(orient='records')
+@router.get("/users")
+def get_users_page(sort: Literal["id", "email"] = "id", page = Depends(page_params), admin = Depends(get_current_admin)):
+    rows = db_admin.pageUsers(page["limit"] + 1, sort, page["descending"], page["after"], page["search"])
+    return ORJSONResponse(page_response(rows, page["limit"], sort))
 
+@router.get("/heatmaps")
+def get_heatmaps_page(sort: Literal["id", "created_at", "name"] = "id", page = Depends(page_params), admin = Depends(get_current_admin)):
+    rows = db_admin.pageHeatmaps(page["limit"] + 1, sort, page["descending"], page["after"], page["search"])
+    return ORJSONResponse(page_response(rows, page["limit"], sort))
 
-        heatmaps = db_admin._returnDataframe(db_admin.queryExecution("""
-            SELECT h.id, h.img_name as name, h.created_at, u.email as owner 
-            FROM Heatmaps h JOIN Users u ON h.user_id = u.id
-        """)).to_dict(orient='records')
+@router.get("/models")
+def get_models_page(sort: Literal["id", "created_at", "model_name"] = "id", page = Depends(page_params), admin = Depends(get_current_admin)):
+    rows = db_admin.pageModels(page["limit"] + 1, sort, page["descending"], page["after"], page["search"])
+    return ORJSONResponse(page_response(rows, page["limit"], sort))
 
-        models = db_admin._returnDataframe(db_admin.queryExecution("""
-            SELECT m.id, m.model_name, m.created_at, u.email as owner 
-            FROM Models m JOIN Users u ON m.user_id = u.id
-        """)).to_dict(orient='records')
+@router.get("/metrics/password-hashing")
+def get_password_hashing_metrics(admin = Depends(get_current_admin)):
+    """Counters of the login/registration hashing pool of this worker process."""
+    return authService.hashing.metrics()
 
-    except sqlite3.Error as e:
-        raise HTTPException(status_code=500, detail="Database query failed")
-    
-    return {"stats": stats, "users": users, "heatmaps": heatmaps, "models": models}
+@router.get("/metrics/startup")
+def get_startup_metrics(request: Request, admin = Depends(get_current_admin)):
+    """Cold-start timing breakdown of this worker process: imports, bootstrap lock and each bootstrap step."""
+    return request.app.state.startup
+
+def log_filter(
+    code: str | None = Query(None, description="Comma separated log codes, e.g. QUERYERROR,FILEDELETEERROR"),
+    level: str | None = Query(None, description="Minimum level: DEBUG, INFO, WARNING or ERROR"),
+    since: datetime | None = Query(None, description="ISO 8601 time, UTC when no offset is given"),
+    until: datetime | None = Query(None, description="ISO 8601 time, UTC when no offset is given")
+):
+    if level is not None and level.upper() not in LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown level, use one of: {', '.join(LEVELS)}")
+    codes = {c.strip().upper() for c in code.split(",") if c.strip()} if code else None
+    min_level = LEVELS[level.upper()] if level else 0
+    return log_service.matcher(codes, min_level, since, until), since
 
 @router.get("/logs", response_class=PlainTextResponse)
-async def get_logs(admin = Depends(get_current_admin)):
-    log_path = Config.LOG_PATH / "log.txt"
-    if not log_path.exists():
+def get_logs(
+    limit: int = Query(300, ge=1, le=5000),
+    log_query = Depends(log_filter),
+    admin = Depends(get_current_admin)
+):
+    if not log_service.files():
         raise HTTPException(status_code=404, detail="Log file not found")
-    with open(log_path, "r") as f:
-        return "".join(f.readlines()[-300:])
+    match, since = log_query
+    lines = log_service.tail(limit, match, since)
+    return "".join(line + "\n" for line in lines)
+
+@router.get("/logs/stream")
+async def stream_logs(log_query = Depends(log_filter), admin = Depends(get_current_admin)):
+    match, _ = log_query
+    return StreamingResponse(
+        log_service.follow(match),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx from holding events back in its proxy buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.options("/alter_users")
 async def alter_users_options():
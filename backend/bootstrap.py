@@ -0,0 +1,71 @@
+"""
+One-off startup work: schema migrations, the default accounts and the render job cleanup.
+
+Run it once as a pre-start step (python bootstrap.py) before the API workers are spawned.
+The API lifespan calls it as well, behind a file lock, so a deployment without the
+pre-start step still migrates and hashes the default passwords exactly once; on an
+already bootstrapped database every step is a handful of cheap queries.
+"""
+import time
+from pathlib import Path
+from config import Config
+from database import Database
+from models import UserCreate
+from services.auth_service import authService
+from services.storage_service import file_lock
+
+def create_dummy(db: Database) -> None:
+    dummy_admin = db.findUser(Config.DB_USER)
+    if dummy_admin is None:
+        admin_user = UserCreate(
+            email=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            role=2
+        )
+        hashed_password = authService.hash_password(admin_user.password)
+        admin_user.password = hashed_password
+        db.addUser(admin_user)
+
+    dummy_user = db.findUser('dummy@heatmap.id')
+    if dummy_user is None:
+        normal_user = UserCreate(
+            email='dummy@heatmap.id',
+            password='dummy',
+            role=1
+        )
+        hashed_password = authService.hash_password(normal_user.password)
+        normal_user.password = hashed_password
+        db.addUser(normal_user)
+
+def bootstrap() -> dict[str, float]:
+    """
+    Brings the database up to date while holding the bootstrap lock, so workers starting
+    together wait for the first one instead of all racing through the same work.
+    Returns the duration of every step in seconds.
+    """
+    db = Database()
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    with file_lock(Path(f"{Config.DB_PATH}.bootstrap.lock")):
+        timings["lock"] = time.perf_counter() - started
+        try:
+            for name, step in (
+                ("migrate", db.migrate),
+                ("accounts", lambda: create_dummy(db)),
+                ("purge_jobs", db.purgeRenderJobs),
+            ):
+                step_started = time.perf_counter()
+                step()
+                timings[name] = time.perf_counter() - step_started
+        finally:
+            db.close()
+    return timings
+
+def format_timings(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+
+if __name__ == "__main__":
+    timings = bootstrap()
+    message = f"Bootstrap complete in {sum(timings.values()):.2f}s ({format_timings(timings)})"
+    print(message)
+    Config.log(message, "STARTUP")
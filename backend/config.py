@@ -1,73 +1,50 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
-from datetime import datetime as dt
-from pathlib import Path
+from typing import Callable
+from logger import AsyncLogger
 
 BASE_DIR    = Path(__file__).resolve().parent
 load_dotenv(find_dotenv())
 
-class Message ():
-    """
-        Message class for log in log text file.
-    """
-
-
-    _basePath:Path|str = Path(os.getenv("LOG_PATH", "data/logs"))
-    _Send: bool = False
-    _Message: str
-    _Code: str|None
-
-    def __init__(self, message:str, code:str|None):
-        self._Message = message
-        self._Code = code if code else '-'
-        
-        try:
-            if (self._basePath.exists() == False):
-                self._basePath.parent.mkdir(parents=True, exist_ok=True)
-        except Exception as e:
-            tempMessage = self._Message
-            tempCode = self._Code
-            self._Message = f"Failed to set log path: {str(e)}. Original message: {tempMessage}"
-            self._Code = "LOGPATHERROR"
-            self.addMessage()
-            self._Message = tempMessage
-            self._Code = tempCode
-            self._basePath = Path('./')
-            pass
-        
-
-        self._Send = self.addMessage()
-
-    def addMessage(self)->bool:
-        f"""
-            Adding message to log, that located on {self._basePath}
-        """
-        try:
-            with open (self._basePath/'log.txt', "a") as op:
-                op.write(f'({dt.now().strftime("%Y-%m-%d|%I:%M:%S")}) {self}\n')
-        except Exception as e:
-            return False
-        return True
-    
-    def getSend(self)->bool:
-        return self._Send
-    
-    def __str__(self)->str:
-        return f'[{self._Code}] {self._Message}'
-
-
-
 class Setting():
     PROJECT_NAME: str = 'EyeGaze_Backend'
     JWT_TOKEN: str = str(os.getenv('JWT_TOKEN', ''))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 30))
     HEATMAP_PATH: Path = Path(os.getenv("HEATMAP_PATH", "data/heatmap_storage"))
     MODEL_PATH = Path(os.getenv("MODEL_PATH", "data/models"))
+    GAZE_PATH: Path = Path(os.getenv("GAZE_PATH", "data/gaze_storage"))
+    AGGREGATE_PATH: Path = Path(os.getenv("AGGREGATE_PATH", "data/aggregates"))
+    RENDER_CACHE_PATH: Path = Path(os.getenv("RENDER_CACHE_PATH", "data/render_cache"))
+    RENDER_CACHE_MAX_MB: int = int(os.getenv('RENDER_CACHE_MAX_MB', 512))
+    MODEL_CACHE_MAX_MB: int = int(os.getenv('MODEL_CACHE_MAX_MB', 256))
+    RENDER_WORKERS: int = int(os.getenv('RENDER_WORKERS', 2))
+    RENDER_QUEUE_DEPTH: int = int(os.getenv('RENDER_QUEUE_DEPTH', 16))
+    SESSION_MAX_POINTS: int = int(os.getenv('SESSION_MAX_POINTS', 500000))
+    MODEL_UPLOAD_MAX_MB: int = int(os.getenv('MODEL_UPLOAD_MAX_MB', 10))
+    MODEL_MAX_PIXELS: int = int(os.getenv('MODEL_MAX_PIXELS', 40000000))
+    MODEL_CACHE_SIDECAR: bool = os.getenv('MODEL_CACHE_SIDECAR', "False") == "True"
+    FILE_URL_TTL_SECONDS: int = int(os.getenv('FILE_URL_TTL_SECONDS', 300))
+    ACCEL_REDIRECT: bool = os.getenv('ACCEL_REDIRECT', "False") == "True"
+    ACCEL_ROOT: Path = Path(os.getenv("ACCEL_ROOT", "data"))
+    ACCEL_PREFIX: str = os.getenv('ACCEL_PREFIX', '/protected/')
     LOG_PATH = Path(os.getenv("LOG_PATH", "data/logs"))
+    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_MAX_MB: int = int(os.getenv('LOG_MAX_MB', 20))
+    LOG_BACKUPS: int = int(os.getenv('LOG_BACKUPS', 5))
+    LOG_QUERY_SAMPLE_RATE: float = float(os.getenv('LOG_QUERY_SAMPLE_RATE', 1.0))
     ALGORITHM: str = os.getenv('ALGORITHM', 'HS256')
+    RATE_LIMIT_STORAGE_URI: str = os.getenv('RATE_LIMIT_STORAGE_URI', 'sqlite:///data/ratelimit.db')
+    RATE_LIMIT_STRATEGY: str = os.getenv('RATE_LIMIT_STRATEGY', 'sliding-window-counter')
+    TOKEN_CACHE_SIZE: int = int(os.getenv('TOKEN_CACHE_SIZE', 4096))
+    TOKEN_CACHE_TTL_SECONDS: float = float(os.getenv('TOKEN_CACHE_TTL_SECONDS', 60))
+    BCRYPT_ROUNDS: int = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE: int = int(os.getenv('PASSWORD_HASH_QUEUE', 64))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS', 10))
     DB_HOST: str = os.getenv('DB_HOST', 'localhost')
     DB_PATH: str = os.getenv('DB_PATH', 'database.db')
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
     DB_PORT: int = int(os.getenv('DB_PORT', 8000))
     DB_USER: str = os.getenv('DB_USER', 'admin')
     DB_PASSWORD: str = os.getenv('DB_PASSWORD', 'admin')
@@ -76,12 +53,22 @@ class Setting():
 
 
     def __init__ (self):
+        self.logger = AsyncLogger(
+            self.LOG_PATH,
+            level=self.LOG_LEVEL,
+            max_bytes=self.LOG_MAX_MB * 1024 * 1024,
+            backup_count=self.LOG_BACKUPS,
+            sample_rates={"QUERYSUCCESS": self.LOG_QUERY_SAMPLE_RATE}
+        )
         if not self.JWT_TOKEN:
             self.log('JWT_TOKEN not found in folder ".env"', 'NOTFOUND')
             raise ValueError("Please input 'JWT_TOKEN' for secret token.")
         
-    def log(self, message:str, code:str)->Message|bool:
-        msg = Message(message, code)
-        return msg if msg.getSend() else False
+    def log(self, message:str|Callable[[], str], code:str, level:str|None=None)->bool:
+        """
+            Queues a structured record for the background log writer.
+            Pass a callable as message when building it is costly; it only runs if the record is kept.
+        """
+        return self.logger.log(message, code, level)
 
 Config = Setting()
\ No newline at end of file
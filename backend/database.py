@@ -1,33 +1,62 @@
 from typing import Any
+import base64
+import json
 from config import Config
 import sqlite3 as sql
-import pandas as pd
+import threading
 from models import UserCreate
 from pathlib import Path
 
-class Database():
-    _connect: sql.Connection
+def _count_statements(table:str)->tuple[str, ...]:
+    """Seeds the row count of a table and keeps it current with insert/delete triggers."""
+    return (
+        f"INSERT OR REPLACE INTO TableStats (name, row_count) SELECT '{table}', COUNT(*) FROM {table}",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_count_insert AFTER INSERT ON {table}
+        BEGIN UPDATE TableStats SET row_count = row_count + 1 WHERE name = '{table}'; END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_count_delete AFTER DELETE ON {table}
+        BEGIN UPDATE TableStats SET row_count = row_count - 1 WHERE name = '{table}'; END
+        """,
+    )
 
-    def __init__(self):
-        try:
-            if (Path(Config.DB_PATH).exists() == False):
-                Path(Config.DB_PATH).parent.mkdir(parents=True, exist_ok=True)
-            self._connect = sql.connect(Config.DB_PATH)
-        except Exception as e:
-            raise e
-        
-        self._connect.execute("PRAGMA foreign_keys = ON;")
+def _version_statements(table:str)->tuple[str, ...]:
+    """Replaces the count triggers of a table with ones that also bump its version on every change."""
+    return (
+        f"DROP TRIGGER IF EXISTS trg_{table.lower()}_count_insert",
+        f"DROP TRIGGER IF EXISTS trg_{table.lower()}_count_delete",
+        f"""
+        CREATE TRIGGER trg_{table.lower()}_count_insert AFTER INSERT ON {table}
+        BEGIN UPDATE TableStats SET row_count = row_count + 1, version = version + 1 WHERE name = '{table}'; END
+        """,
+        f"""
+        CREATE TRIGGER trg_{table.lower()}_count_delete AFTER DELETE ON {table}
+        BEGIN UPDATE TableStats SET row_count = row_count - 1, version = version + 1 WHERE name = '{table}'; END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_version_update AFTER UPDATE ON {table}
+        BEGIN UPDATE TableStats SET version = version + 1 WHERE name = '{table}'; END
+        """,
+    )
+
+class Database():
+    _local: threading.local
+    _CACHED_STATEMENTS: int = 256
 
-        self._connect.execute("""
+    # Schema changes, applied in order. Entry N upgrades PRAGMA user_version from N to N+1,
+    # so released entries must never be edited; append a new one instead.
+    _MIGRATIONS: list[tuple[str, ...]] = [
+        (
+            """
             CREATE TABLE IF NOT EXISTS Users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 email TEXT UNIQUE NOT NULL CHECK (email LIKE '%_@_%._%'),
                 password TEXT NOT NULL,
                 role INTEGER NOT NULL DEFAULT 1
             )
-        """)
-
-        self._connect.execute("""
+            """,
+            """
             CREATE TABLE IF NOT EXISTS Heatmaps (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 img_name TEXT NOT NULL,
@@ -37,9 +66,36 @@ class Database():
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES Users (id) ON DELETE CASCADE
             )
-        """)
-
-        self._connect.execute("""
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS GazeSamples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                heatmap_id INTEGER UNIQUE NOT NULL,
+                samples_path TEXT NOT NULL,
+                point_count INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                FOREIGN KEY (heatmap_id) REFERENCES Heatmaps (id) ON DELETE CASCADE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS AggregateSessions (
+                heatmap_id INTEGER PRIMARY KEY,
+                model_id INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS RenderJobs (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                point_count INTEGER NOT NULL,
+                session_id INTEGER,
+                detail TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
             CREATE TABLE IF NOT EXISTS Models (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 model_name TEXT NOT NULL,
@@ -47,35 +103,219 @@ class Database():
                 user_id INTEGER NOT NULL,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
-        """)
+            """
+        ),
+        (
+            "CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON Users (email COLLATE NOCASE)",
+            "CREATE INDEX IF NOT EXISTS idx_heatmaps_user_img ON Heatmaps (user_id, img_name)",
+            "CREATE INDEX IF NOT EXISTS idx_heatmaps_model ON Heatmaps (model_id)",
+            "CREATE INDEX IF NOT EXISTS idx_models_name ON Models (model_name)",
+            "CREATE INDEX IF NOT EXISTS idx_aggregate_sessions_model ON AggregateSessions (model_id)",
+        ),
+        (
+            "CREATE TABLE IF NOT EXISTS TableStats (name TEXT PRIMARY KEY, row_count INTEGER NOT NULL DEFAULT 0)",
+            *_count_statements("Users"),
+            *_count_statements("Heatmaps"),
+            *_count_statements("Models"),
+            "CREATE INDEX IF NOT EXISTS idx_heatmaps_created ON Heatmaps (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_heatmaps_name ON Heatmaps (img_name)",
+            "CREATE INDEX IF NOT EXISTS idx_models_created ON Models (created_at)",
+        ),
+        (
+            "ALTER TABLE TableStats ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+            # A random start keeps ETags of a recreated database from matching stale client copies
+            "UPDATE TableStats SET version = abs(random() % 1000000000)",
+            *_version_statements("Users"),
+            *_version_statements("Heatmaps"),
+            *_version_statements("Models"),
+        ),
+    ]
 
-        self._connect.commit()
-        self._connect.close()
+    # Sortable columns of the admin listings; keys double as the row keys used in page cursors
+    USER_SORTS: dict[str, str] = {"id": "u.id", "email": "u.email"}
+    HEATMAP_SORTS: dict[str, str] = {"id": "h.id", "created_at": "h.created_at", "name": "h.img_name"}
+    MODEL_SORTS: dict[str, str] = {"id": "m.id", "created_at": "m.created_at", "model_name": "m.model_name"}
 
-    def _returnDataframe(self, cursor:sql.Cursor )-> pd.DataFrame:
-        data:list[Any] = cursor.fetchall()
-        colNames:list[Any] = [ desc[0] for desc in cursor.description]
-        return pd.DataFrame(data, columns=colNames)
+    def __init__(self):
+        # No connection is opened here: constructing the handle has no side effects, the
+        # schema is brought up to date once per deployment by migrate() (see bootstrap.py)
+        self._local = threading.local()
 
-    def getConnection(self)->sql.Connection:
-        return sql.connect(Config.DB_PATH)
-    
-    def queryExecution(self, query:str, var:tuple[Any]=[])->sql.Cursor:
-        cursor: sql.Cursor
-        with self.getConnection() as con:
+    def migrate(self)->None:
+        Path(Config.DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+        con = sql.connect(Config.DB_PATH, timeout=Config.DB_BUSY_TIMEOUT_MS / 1000)
+        try:
+            con.execute("PRAGMA foreign_keys = ON;")
+            # WAL is persistent in the database file; readers no longer block the writer
+            con.execute("PRAGMA journal_mode = WAL;")
+            self._migrate(con)
+        finally:
+            con.close()
+
+    def _migrate(self, con:sql.Connection)->None:
+        """
+        Brings the schema up to date, one migration per transaction.
+        The version is re-read under the write lock, so concurrent workers never apply a step twice.
+        """
+        while True:
+            con.execute("BEGIN IMMEDIATE")
             try:
-                cursor: sql.Cursor = con.execute(query, var) if len(var)>0 else con.execute(query)
+                version:int = con.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(self._MIGRATIONS):
+                    con.commit()
+                    return
+                for statement in self._MIGRATIONS[version]:
+                    con.execute(statement)
+                con.execute(f"PRAGMA user_version = {version + 1}")
                 con.commit()
-                for i in range(0,len(var)):
-                    strvar = str(var[i])
-                    query = query.replace('?', strvar if len(strvar) < 128 else strvar[:32] + "..." + strvar[-32:], 1)
-                Config.log(f"Sucessfully execute query ({query})", "QUERYSUCCESS")
             except sql.Error as e:
                 con.rollback()
-                con.close()
+                Config.log(f"There is error when trying to migrate the database schema", "QUERYERROR")
                 raise e
+            Config.log(f"Migrated schema to version {version + 1}", "MIGRATION")
+
+    def _returnRows(self, cursor:sql.Cursor)->list[sql.Row]:
+        return cursor.fetchall()
+
+    def _returnRow(self, cursor:sql.Cursor)->sql.Row|None:
+        return cursor.fetchone()
+
+    def getConnection(self)->sql.Connection:
+        """
+        Returns the long-lived connection of the calling thread, opening it on first use.
+        Each connection keeps its own prepared statement cache.
+        """
+        con: sql.Connection | None = getattr(self._local, "connection", None)
+        if con is None:
+            con = sql.connect(
+                Config.DB_PATH,
+                timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+                cached_statements=self._CACHED_STATEMENTS
+            )
+            con.execute("PRAGMA journal_mode = WAL;")
+            con.execute("PRAGMA synchronous = NORMAL;")
+            con.execute(f"PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)};")
+            # Rows are indexable by column name, so no DataFrame is needed to read them
+            con.row_factory = sql.Row
+            self._local.connection = con
+        return con
+
+    def close(self)->None:
+        """Closes the connection of the calling thread, if it has one."""
+        con: sql.Connection | None = getattr(self._local, "connection", None)
+        if con is not None:
+            con.close()
+            self._local.connection = None
+
+    def _renderQuery(self, query:str, var:tuple[Any])->str:
+        for i in range(0,len(var)):
+            strvar = str(var[i])
+            query = query.replace('?', strvar if len(strvar) < 128 else strvar[:32] + "..." + strvar[-32:], 1)
+        return query
+
+    def queryExecution(self, query:str, var:tuple[Any]=[])->sql.Cursor:
+        cursor: sql.Cursor
+        con = self.getConnection()
+        try:
+            cursor: sql.Cursor = con.execute(query, var) if len(var)>0 else con.execute(query)
+            # Only data changes open an implicit transaction, so reads skip the commit
+            if con.in_transaction:
+                con.commit()
+            # Rendering the parameters into the query text is deferred until the logger keeps the record
+            Config.log(lambda: f"Sucessfully execute query ({self._renderQuery(query, var)})", "QUERYSUCCESS")
+        except sql.Error as e:
+            con.rollback()
+            raise e
         return cursor
     
+    def _page(self, select:str, id_column:str, sort_column:str, descending:bool, limit:int,
+              after:tuple[Any, int]|None, filters:list[tuple[str, tuple[Any, ...]]])->list[sql.Row]:
+        """
+        Keyset pagination: continues strictly after the (sort value, id) of the previous page's last row,
+        so every page costs an index seek instead of an OFFSET scan.
+        """
+        clauses = [clause for clause, _ in filters]
+        params: list[Any] = [param for _, values in filters for param in values]
+        operator = "<" if descending else ">"
+        direction = "DESC" if descending else "ASC"
+        if sort_column == id_column:
+            order = f"{id_column} {direction}"
+            if after is not None:
+                clauses.append(f"{id_column} {operator} ?")
+                params.append(after[1])
+        else:
+            order = f"{sort_column} {direction}, {id_column} {direction}"
+            if after is not None:
+                clauses.append(f"({sort_column}, {id_column}) {operator} (?, ?)")
+                params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor:sql.Cursor = self.queryExecution(f"{select} {where} ORDER BY {order} LIMIT ?", (*params, limit))
+        return self._returnRows(cursor)
+
+    def _searchPattern(self, search:str)->str:
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
+    def getTableCounts(self)->dict[str, int]|None:
+        query = "SELECT name, row_count FROM TableStats"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query)
+            return {row["name"]: row["row_count"] for row in self._returnRows(cursor)}
+        except sql.Error as e:
+            Config.log(f"There is error when trying to get table counts", "QUERYERROR")
+        return None
+
+    def getTableVersion(self, table:str)->int|None:
+        query = "SELECT version FROM TableStats WHERE name = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (table,))
+            row = self._returnRow(cursor)
+            return None if row is None else row["version"]
+        except sql.Error as e:
+            Config.log(f"There is error when trying to get table version ({table})", "QUERYERROR")
+        return None
+
+    def pageUsers(self, limit:int, sort:str="id", descending:bool=False,
+                  after:tuple[Any, int]|None=None, search:str|None=None)->list[sql.Row]|None:
+        select = """
+            SELECT u.id, u.email, u.role, (SELECT COUNT(*) FROM Heatmaps h WHERE h.user_id = u.id) AS sessions
+            FROM Users u
+        """
+        filters = [("u.email LIKE ? ESCAPE '\\'", (self._searchPattern(search),))] if search else []
+        try:
+            return self._page(select, "u.id", self.USER_SORTS[sort], descending, limit, after, filters)
+        except sql.Error as e:
+            Config.log(f"There is error when trying to page Users", "QUERYERROR")
+        return None
+
+    def pageHeatmaps(self, limit:int, sort:str="id", descending:bool=False,
+                     after:tuple[Any, int]|None=None, search:str|None=None)->list[sql.Row]|None:
+        select = """
+            SELECT h.id, h.img_name as name, h.created_at, u.email as owner
+            FROM Heatmaps h JOIN Users u ON h.user_id = u.id
+        """
+        pattern = self._searchPattern(search) if search else None
+        filters = [("(h.img_name LIKE ? ESCAPE '\\' OR u.email LIKE ? ESCAPE '\\')", (pattern, pattern))] if search else []
+        try:
+            return self._page(select, "h.id", self.HEATMAP_SORTS[sort], descending, limit, after, filters)
+        except sql.Error as e:
+            Config.log(f"There is error when trying to page Heatmaps", "QUERYERROR")
+        return None
+
+    def pageModels(self, limit:int, sort:str="id", descending:bool=False,
+                   after:tuple[Any, int]|None=None, search:str|None=None)->list[sql.Row]|None:
+        select = """
+            SELECT m.id, m.model_name, m.created_at, u.email as owner
+            FROM Models m JOIN Users u ON m.user_id = u.id
+        """
+        pattern = self._searchPattern(search) if search else None
+        filters = [("(m.model_name LIKE ? ESCAPE '\\' OR u.email LIKE ? ESCAPE '\\')", (pattern, pattern))] if search else []
+        try:
+            return self._page(select, "m.id", self.MODEL_SORTS[sort], descending, limit, after, filters)
+        except sql.Error as e:
+            Config.log(f"There is error when trying to page Models", "QUERYERROR")
+        return None
+
     def addUser(self, user: UserCreate)->int|None:
         query = "INSERT INTO Users (email, password, role) VALUES (?, ?, ?)"
         try:
@@ -94,21 +334,21 @@ class Database():
             Config.log(f"There is error when trying to delete User ({id})", "QUERYERROR")
         return None
     
-    def findUser(self, email: str)->pd.DataFrame:
-        query = "SELECT * FROM Users WHERE email LIKE ?"
+    def findUser(self, email: str)->sql.Row|None:
+        query = "SELECT * FROM Users WHERE email = ? COLLATE NOCASE"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (email,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:sql.Row|None = self._returnRow(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find User ({email})", "QUERYERROR")
         return None
     
-    def findUserById(self, id: int)->pd.DataFrame:
+    def findUserById(self, id: int)->sql.Row|None:
         query = "SELECT * FROM Users WHERE id = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (id,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:sql.Row|None = self._returnRow(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find User ({id})", "QUERYERROR")
@@ -132,46 +372,63 @@ class Database():
             Config.log(f"There is error when trying to delete ImageModel ({id})", "QUERYERROR")
         return None
     
-    def findImageModel(self, id: int)->pd.DataFrame:
+    def findImageModel(self, id: int)->sql.Row|None:
         query = "SELECT * FROM Models WHERE id = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (id,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:sql.Row|None = self._returnRow(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find ImageModel ({id})", "QUERYERROR")
         return None
     
-    def findImageModelByName(self, model_name: str)->pd.DataFrame:
+    def findImageModelByName(self, model_name: str)->list[sql.Row]|None:
         query = "SELECT * FROM Models WHERE model_name = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (model_name,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:list[sql.Row] = self._returnRows(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to check ImageModel exists ({model_name})", "QUERYERROR")
         return None
     
-    def findImageModelByUserID(self, id: int)->pd.DataFrame:
+    def existsImageModelName(self, model_name: str)->bool|None:
+        query = "SELECT EXISTS (SELECT 1 FROM Models WHERE model_name = ?)"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (model_name,))
+            return bool(cursor.fetchone()[0])
+        except sql.Error as e:
+            Config.log(f"There is error when trying to check ImageModel exists ({model_name})", "QUERYERROR")
+        return None
+
+    def findImageModelByUserID(self, id: int)->list[sql.Row]|None:
         query = "SELECT * FROM Models WHERE user_id = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (id,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:list[sql.Row] = self._returnRows(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find ImageModel ({id})", "QUERYERROR")
         return None
 
-    def getAllImageModels(self)->pd.DataFrame:
+    def getAllImageModels(self)->list[sql.Row]|None:
         query = "SELECT * FROM Models"
         try:
             cursor:sql.Cursor = self.queryExecution(query)
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:list[sql.Row] = self._returnRows(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to get all ImageModels", "QUERYERROR")
         return None
 
+    def pageImageModels(self, limit:int, after:tuple[Any, int]|None=None)->list[sql.Row]|None:
+        select = "SELECT id, model_name, created_at, user_id FROM Models"
+        try:
+            return self._page(select, "id", "id", False, limit, after, [])
+        except sql.Error as e:
+            Config.log(f"There is error when trying to page ImageModels", "QUERYERROR")
+        return None
+
     def addHeatmap(self, img_name:str, image_path:str, model_id: int, user_id:int )->int|None:
         query = "INSERT INTO Heatmaps (img_name, image_path, model_id, user_id) VALUES (?, ?, ?, ?)"
         try:
@@ -190,24 +447,209 @@ class Database():
             Config.log(f"There is error when trying to delete Heatmap ({id})", "QUERYERROR")
         return None
     
-    def findHeatmap(self, id: int)->pd.DataFrame:
+    def findHeatmap(self, id: int)->sql.Row|None:
         query = "SELECT * FROM Heatmaps WHERE id = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (id,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:sql.Row|None = self._returnRow(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find Heatmap ({id})", "QUERYERROR")
         return None
     
-    def findHeatmapByUserID(self, id: int)->pd.DataFrame:
+    def findHeatmapByUserID(self, id: int)->list[sql.Row]|None:
         query = "SELECT * FROM Heatmaps WHERE user_id = ?"
         try:
             cursor:sql.Cursor = self.queryExecution(query, (id,))
-            data:pd.DataFrame = self._returnDataframe(cursor)
+            data:list[sql.Row] = self._returnRows(cursor)
             return data
         except sql.Error as e:
             Config.log(f"There is error when trying to find Heatmap ({id})", "QUERYERROR")
         return None
-    
-    
+
+    def pageHeatmapsByUserID(self, id:int, limit:int, after:tuple[Any, int]|None=None)->list[sql.Row]|None:
+        select = "SELECT id, img_name, created_at FROM Heatmaps"
+        try:
+            return self._page(select, "id", "id", False, limit, after, [("user_id = ?", (id,))])
+        except sql.Error as e:
+            Config.log(f"There is error when trying to page Heatmaps ({id})", "QUERYERROR")
+        return None
+
+    def existsHeatmapName(self, user_id: int, img_name: str)->bool|None:
+        query = "SELECT EXISTS (SELECT 1 FROM Heatmaps WHERE user_id = ? AND img_name = ?)"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (user_id, img_name))
+            return bool(cursor.fetchone()[0])
+        except sql.Error as e:
+            Config.log(f"There is error when trying to check Heatmap exists ({user_id}, {img_name})", "QUERYERROR")
+        return None
+
+    def addGazeSamples(self, heatmap_id:int, samples_path:str, point_count:int, width:int, height:int)->int|None:
+        query = "INSERT INTO GazeSamples (heatmap_id, samples_path, point_count, width, height) VALUES (?, ?, ?, ?, ?)"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id, samples_path, point_count, width, height))
+            return cursor.lastrowid
+        except sql.Error as e:
+            Config.log(f"There is error when trying to add GazeSamples ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def findGazeSamples(self, heatmap_id: int)->sql.Row|None:
+        query = "SELECT * FROM GazeSamples WHERE heatmap_id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id,))
+            data:sql.Row|None = self._returnRow(cursor)
+            return data
+        except sql.Error as e:
+            Config.log(f"There is error when trying to find GazeSamples ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def delGazeSamples(self, heatmap_id:int)->int|None:
+        query = "DELETE FROM GazeSamples WHERE heatmap_id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id,))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to delete GazeSamples ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def addRenderJob(self, id:str, user_id:int, point_count:int)->int|None:
+        query = "INSERT INTO RenderJobs (id, user_id, point_count) VALUES (?, ?, ?)"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (id, user_id, point_count))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to add RenderJob ({id})", "QUERYERROR")
+        return None
+
+    def updateRenderJob(self, id:str, status:str, session_id:int|None=None, detail:str|None=None)->int|None:
+        query = "UPDATE RenderJobs SET status = ?, session_id = ?, detail = ? WHERE id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (status, session_id, detail, id))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to update RenderJob ({id})", "QUERYERROR")
+        return None
+
+    def delRenderJob(self, id:str)->int|None:
+        query = "DELETE FROM RenderJobs WHERE id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (id,))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to delete RenderJob ({id})", "QUERYERROR")
+        return None
+
+    def purgeRenderJobs(self, older_than_hours:int=24, lost_after_hours:int=1)->int|None:
+        """
+        Fails jobs still queued after lost_after_hours, whose worker process must have died with them,
+        then deletes finished jobs older than older_than_hours. Returns the number of deleted jobs.
+        """
+        lost = "UPDATE RenderJobs SET status = 'failed', detail = 'Render job was lost' WHERE status = 'queued' AND created_at < datetime('now', ?)"
+        query = "DELETE FROM RenderJobs WHERE status != 'queued' AND created_at < datetime('now', ?)"
+        try:
+            self.queryExecution(lost, (f"-{lost_after_hours} hours",))
+            cursor:sql.Cursor = self.queryExecution(query, (f"-{older_than_hours} hours",))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to purge RenderJobs", "QUERYERROR")
+        return None
+
+    def findRenderJob(self, id: str)->sql.Row|None:
+        query = "SELECT * FROM RenderJobs WHERE id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (id,))
+            data:sql.Row|None = self._returnRow(cursor)
+            return data
+        except sql.Error as e:
+            Config.log(f"There is error when trying to find RenderJob ({id})", "QUERYERROR")
+        return None
+
+    def findUnaggregatedSessions(self, model_id: int)->list[sql.Row]|None:
+        query = """
+            SELECT h.id, g.samples_path, g.width, g.height
+            FROM Heatmaps h
+            JOIN GazeSamples g ON g.heatmap_id = h.id
+            LEFT JOIN AggregateSessions a ON a.heatmap_id = h.id
+            WHERE h.model_id = ? AND a.heatmap_id IS NULL
+        """
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (model_id,))
+            data:list[sql.Row] = self._returnRows(cursor)
+            return data
+        except sql.Error as e:
+            Config.log(f"There is error when trying to find unaggregated sessions ({model_id})", "QUERYERROR")
+        return None
+
+    def findSessionSamplesByModel(self, model_id: int, user_ids: list[int])->list[sql.Row]|None:
+        placeholders = ", ".join("?" for _ in user_ids)
+        query = f"""
+            SELECT h.id, g.samples_path, g.width, g.height
+            FROM Heatmaps h
+            JOIN GazeSamples g ON g.heatmap_id = h.id
+            WHERE h.model_id = ? AND h.user_id IN ({placeholders})
+            ORDER BY h.id
+        """
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (model_id, *user_ids))
+            data:list[sql.Row] = self._returnRows(cursor)
+            return data
+        except sql.Error as e:
+            Config.log(f"There is error when trying to find session samples ({model_id})", "QUERYERROR")
+        return None
+
+    def addAggregateSession(self, heatmap_id:int, model_id:int)->int|None:
+        query = "INSERT INTO AggregateSessions (heatmap_id, model_id) VALUES (?, ?)"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id, model_id))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to add AggregateSession ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def findAggregateSession(self, heatmap_id: int)->sql.Row|None:
+        query = "SELECT * FROM AggregateSessions WHERE heatmap_id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id,))
+            data:sql.Row|None = self._returnRow(cursor)
+            return data
+        except sql.Error as e:
+            Config.log(f"There is error when trying to find AggregateSession ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def delAggregateSession(self, heatmap_id:int)->int|None:
+        query = "DELETE FROM AggregateSessions WHERE heatmap_id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (heatmap_id,))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to delete AggregateSession ({heatmap_id})", "QUERYERROR")
+        return None
+
+    def delAggregateSessionsByModel(self, model_id:int)->int|None:
+        query = "DELETE FROM AggregateSessions WHERE model_id = ?"
+        try:
+            cursor:sql.Cursor = self.queryExecution(query, (model_id,))
+            return cursor.rowcount
+        except sql.Error as e:
+            Config.log(f"There is error when trying to delete AggregateSessions ({model_id})", "QUERYERROR")
+        return None
+
+def records(rows:list[sql.Row], *columns:str)->list[dict[str, Any]]:
+    """Turns rows into plain dicts, keeping only the given columns (all when none are given)."""
+    if not columns:
+        return [dict(row) for row in rows]
+    return [{column: row[column] for column in columns} for row in rows]
+
+def encode_cursor(sort_value:Any, id:int)->str:
+    """Opaque page cursor holding the (sort value, id) of the last row returned."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor:str)->tuple[Any, int]:
+    """Raises ValueError for cursors this module did not produce."""
+    try:
+        sort_value, id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid page cursor") from e
+    if not isinstance(id, int) or isinstance(sort_value, (list, dict)):
+        raise ValueError("Invalid page cursor")
+    return sort_value, id
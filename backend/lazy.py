@@ -0,0 +1,39 @@
+"""
+Deferred imports of the heavy numerical modules (numpy, OpenCV).
+API workers start without them and the first request that needs one pays for the import.
+"""
+import importlib
+import threading
+from types import ModuleType
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    The import runs under a lock, so concurrent first uses from the request
+    thread pool never execute a module twice.
+    Own attributes are prefixed with _lazy_ so they never shadow the module's (np.load...).
+    """
+
+    def __init__(self, name: str):
+        self._lazy_name = name
+        self._lazy_module: ModuleType | None = None
+        self._lazy_lock = threading.Lock()
+
+    def _lazy_load(self) -> ModuleType:
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self._lazy_name)
+                module = self._lazy_module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._lazy_load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,169 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+LEVELS: dict[str, int] = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+class AsyncLogger():
+    """
+        Writes structured log records as JSON lines from a background thread.
+        Callers only pay for a queue put; the writer batches records into a single
+        write per flush and rotates the file once it grows past max_bytes.
+    """
+
+    DEBUG_CODES: set[str] = {"QUERYSUCCESS"}
+    WARNING_CODES: set[str] = {"NOTFOUND"}
+    FLUSH_INTERVAL: float = 0.5
+    BATCH_SIZE: int = 512
+
+    def __init__(self, log_dir: Path, file_name: str = "log.jsonl", level: str = "INFO",
+                 max_bytes: int = 20 * 1024 * 1024, backup_count: int = 5,
+                 sample_rates: dict[str, float] | None = None, queue_size: int = 10000):
+        self.log_dir = Path(log_dir)
+        self.path = self.log_dir / file_name
+        self.level = LEVELS.get(level.upper(), LEVELS["INFO"])
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_rates = sample_rates or {}
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._file = None
+        atexit.register(self.close)
+
+    def level_of(self, code: str) -> str:
+        if code in self.DEBUG_CODES:
+            return "DEBUG"
+        if code in self.WARNING_CODES:
+            return "WARNING"
+        return "ERROR" if code.endswith("ERROR") else "INFO"
+
+    def enabled(self, code: str, level: str | None = None) -> bool:
+        """Level check plus sampling, decided once per record before any formatting work."""
+        if LEVELS[level or self.level_of(code)] < self.level:
+            return False
+        rate = self.sample_rates.get(code, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    def log(self, message: str | Callable[[], str], code: str | None, level: str | None = None) -> bool:
+        """
+            Queues a record and returns whether it was accepted.
+            message may be a callable, which is only evaluated when the record is kept.
+        """
+        code = code or "-"
+        level = level or self.level_of(code)
+        if not self.enabled(code, level):
+            return False
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "code": code,
+            "msg": message() if callable(message) else str(message),
+            "pid": os.getpid(),
+        }
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging; the writer reports the loss later
+            self.dropped += 1
+            return False
+        return True
+
+    def _ensure_writer(self) -> None:
+        # A forked child inherits the queue but not the thread, so restart per process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._file = None
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [record for record in batch if record is not None]
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                batch.append({
+                    "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                    "level": "WARNING", "code": "LOGDROPPED",
+                    "msg": f"Dropped {dropped} log records, the log queue was full", "pid": os.getpid()
+                })
+            if batch:
+                self._write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+
+    def _write(self, data: str) -> None:
+        try:
+            handle = self._open()
+            size = os.fstat(handle.fileno()).st_size
+            if size > 0 and size + len(data) > self.max_bytes:
+                self._rotate()
+                handle = self._open()
+            handle.write(data)
+            handle.flush()
+        except OSError:
+            self._file = None
+
+    def _open(self):
+        # Another worker may have rotated the file underneath this handle
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino:
+                    return self._file
+            except OSError:
+                pass
+            self._file.close()
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flushes queued records and stops the writer thread."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,152 +1,201 @@
+from __future__ import annotations
+import time
+# Start of the cold-start timing report, imports included
+started_at = time.perf_counter()
+import io
 from pathlib import Path
+from functools import partial
+from typing import BinaryIO, Callable, Literal
 import uuid
-import pandas as pd
 from config import Config
-from database import Database
-from fastapi import FastAPI, HTTPException, Depends, Response, status, Request
-from fastapi.responses import FileResponse
+from database import Database, records, decode_cursor
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, status, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartParser, MultiPartException
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 from limits import parse
-from models import Image_ModelUpload, UserLogin, UserCreate, HeatmapUpload
-from services.auth_service import authService, oauth2_scheme
+import services.limiter_storage  # registers the sqlite:// limiter storage
+from models import Image_ModelUpload, UserLogin, UserCreate, HeatmapSession, HeatmapUpload, HeatmapStreamStart, HeatmapStreamBatch
+from services.auth_service import authService, token_payload, optional_token_payload, HashingBusy
 from contextlib import asynccontextmanager
+from concurrent.futures import Future
 from services.heatpmap_service import heatmap_service
+from services.gaze_service import gaze_service
+from services.render_cache_service import render_cache
+from services.model_cache_service import model_cache
+from services.aggregate_service import aggregate_service
+from services.stream_service import GazeStream
+from services.storage_service import save_heatmap_to_disk, probe_image_size, model_blobs, heatmap_blobs
+from services.file_service import file_service
+from services.thumbnail_service import thumbnail_service
+from services.job_service import render_jobs, JobQueueFull
+from services.render_worker import render_session
 from admin import router as admin_router
-from admin import get_current_admin
+from admin import get_current_admin, page_response
 import base64
-import numpy as np
-import cv2
+import hashlib
+import json
+import math
+from bootstrap import bootstrap, format_timings
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+imports_done_at = time.perf_counter()
 
 db:Database = Database()
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=Config.RATE_LIMIT_STORAGE_URI,
+    strategy=Config.RATE_LIMIT_STRATEGY
+)
 
-def save_model_to_disk(base64_str: str, model_name: str) -> str:
+def save_model_to_disk(img_bytes: bytes) -> str:
     """
-    Saves a base64 model file to the disk in the model folder.
+    Saves model image bytes to the model blob store.
     Returns the relative file path to be stored in the database.
     """
-
-    model_dir = Config.MODEL_PATH
-    model_dir.mkdir(parents=True, exist_ok=True)
-
-    if "," in base64_str:
-        base64_str = base64_str.split(",")[1]
-
-    unique_id = uuid.uuid4().hex
-    filename = f"{unique_id}_{model_name.replace(' ', '_')}.png"
-    file_path = model_dir / filename
-
-    model_data = base64.b64decode(base64_str)
-    with open(file_path, "wb") as f:
-        f.write(model_data)
-
-    return str(file_path)
+    return model_blobs.put(img_bytes)
 
 def delete_model_from_disk(file_path: str) -> bool:
     """
-    Deletes the model file from disk.
-    Returns True if deletion was successful, False otherwise.
+    Releases the model's reference on its file; the file is removed with its last reference.
+    Returns True if the release was successful, False otherwise.
     """
     try:
-        path = Path(file_path)
-        if path.exists():
-            path.unlink()
-            return True
-        else:
-            return False
+        return model_blobs.release(file_path)
     except Exception as e:
         Config.log(f"Error deleting file {file_path}: {e}", "FILEDELETEERROR")
         return False
 
-def save_heatmap_to_disk(user_id: int, base64_str: str, session_name: str) -> str:
-    """
-    Saves a base64 image to the disk in a user-specific folder.
-    Returns the relative file path to be stored in the database.
-    """
-
-    user_dir = Config.HEATMAP_PATH / f"user_{user_id}"
-    user_dir.mkdir(parents=True, exist_ok=True)
-
-    if "," in base64_str:
-        base64_str = base64_str.split(",")[1]
-
-    unique_id = uuid.uuid4().hex
-    filename = f"{unique_id}_{session_name.replace(' ', '_')}.png"
-    file_path = user_dir / filename
-
-    img_data = base64.b64decode(base64_str)
-    with open(file_path, "wb") as f:
-        f.write(img_data)
-
-    return str(file_path)
-
 def delete_heatmap_from_disk(file_path: str) -> bool:
     """
-    Deletes the heatmap image from disk.
-    Returns True if deletion was successful, False otherwise.
+    Releases the session's reference on its heatmap image; the file is removed with its last reference.
+    Returns True if the release was successful, False otherwise.
     """
     try:
-        path = Path(file_path)
-        if path.exists():
-            path.unlink()
-            return True
-        else:
-            return False
+        return heatmap_blobs.release(file_path)
     except Exception as e:
         Config.log(f"Error deleting file {file_path}: {e}", "FILEDELETEERROR")
         return False
 
-def decode_base64_to_cv2(base64_string):
+def decode_base64(base64_string: str) -> bytes:
     if "," in base64_string:
         base64_string = base64_string.split(",")[1]
 
-    img_bytes = base64.b64decode(base64_string)
-    nparr = np.frombuffer(img_bytes, np.uint8)
-    
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    return img
-
-def create_dummy():
-    dummy_admin = db.findUser(Config.DB_USER)
-    if dummy_admin.empty:
-        admin_user = UserCreate(
-            email=Config.DB_USER,
-            password=Config.DB_PASSWORD,
-            role=2
-        )
-        hashed_password = authService.hash_password(admin_user.password)
-        admin_user.password = hashed_password
-        db.addUser(admin_user)
-
-    dummy_user = db.findUser('dummy@heatmap.id')
-    if dummy_user.empty:
-        normal_user = UserCreate(
-            email='dummy@heatmap.id',
-            password='dummy',
-            role=1
-        )
-        hashed_password = authService.hash_password(normal_user.password)
-        normal_user.password = hashed_password
-        db.addUser(normal_user)
+    return base64.b64decode(base64_string)
+
+def validate_model_image(f: BinaryIO) -> tuple[int, int]:
+    """
+    Checks that f holds a readable image within MODEL_MAX_PIXELS and returns its (width, height).
+    The size comes from the header when the format is known; anything else is decoded once by OpenCV.
+    """
+    size = probe_image_size(f)
+    if size is None:
+        f.seek(0)
+        img = cv2.imdecode(np.frombuffer(f.read(), np.uint8), cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
+        size = (img.shape[1], img.shape[0])
+
+    width, height = size
+    if width <= 0 or height <= 0:
+        raise HTTPException(status_code=400, detail="Invalid image data")
+    if width * height > Config.MODEL_MAX_PIXELS:
+        raise HTTPException(status_code=413, detail=f"Image exceeds the limit of {Config.MODEL_MAX_PIXELS} pixels")
+    return width, height
+
+class UploadTooLarge(MultiPartException):
+    pass
 
-async def request_limiter ( request: Request) -> bool:
+async def read_capped_form(request: Request, max_bytes: int) -> FormData:
+    """
+    Parses a multipart body chunk by chunk; file parts are spooled to temp files instead of memory.
+    Fails with 413 as soon as the body grows past max_bytes, whatever Content-Length claims.
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+    too_large = HTTPException(status_code=413, detail=f"Upload exceeds the limit of {max_bytes // (1024 * 1024)} MB")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    async def capped_stream():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise UploadTooLarge("Upload too large")
+            yield chunk
+
+    try:
+        return await MultiPartParser(request.headers, capped_stream(), max_files=1, max_fields=1).parse()
+    except UploadTooLarge:
+        raise too_large
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+async def read_capped_body(request: Request, max_bytes: int, too_large: HTTPException) -> bytearray:
+    """
+    Reads a raw body chunk by chunk, failing with too_large as soon as it grows past max_bytes,
+    whatever Content-Length claims.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return body
+
+def store_model_upload(source: BinaryIO, model_name: str, user_id: int) -> tuple[int, str]:
+    """
+    Validates an uploaded model file, moves it into the blob store and records it.
+    Returns the new model id and file path.
+    """
+    validate_model_image(source)
+    source.seek(0)
+    tmp_path, digest = model_blobs.stage(source)
+    try:
+        file_path = model_blobs.put_file(tmp_path, digest)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    model_id = db.addImageModel(model_name, file_path, user_id)
+    if model_id is None:
+        delete_model_from_disk(file_path)
+        raise HTTPException(status_code=500, detail="Failed to save model")
+    return model_id, file_path
+
+def generate_model_previews(model_id: int, file_path: str) -> None:
+    """Decodes a new model once through the model cache, which also warms it for the first render, and writes its previews."""
+    thumbnail_service.generate_quietly(file_path, model_cache.get(model_id, file_path))
+
+def subject_key(payload: dict) -> str:
+    return "sub:" + hashlib.sha256(str(payload.get("sub")).encode("utf-8")).hexdigest()[:32]
+
+# Plain def: the shared limiter storage may wait on SQLite's write lock, which must not
+# happen on the event loop, so FastAPI runs this dependency in the threadpool
+def request_limiter ( request: Request, payload: dict | None = Depends(optional_token_payload)) -> bool:
     limit:str
-    auth_header = request.headers.get("Authorization")
     ip = get_remote_address(request)
     if ip == "127.0.0.1":
         limit = "1000/minute"
-    elif auth_header and auth_header.split(" ")[1] != "null":
-        try:
-            decoded_token = authService.decode_token(auth_header.split(" ")[1])
-            if decoded_token["role"] == 2:
-                limit = "100/minute"
-            else:
-                limit = "50/minute"
-        except HTTPException as e:
-            raise e
+    elif payload is not None:
+        if payload["role"] == 2:
+            limit = "100/minute"
+        else:
+            limit = "50/minute"
     else :
         path = request.url.path
         if path.startswith("/api/register"):
@@ -154,30 +203,26 @@ async def request_limiter ( request: Request) -> bool:
         else:
             limit = "50/hours"
 
-    try :
-        parsed_limit = parse(limit)
-        is_allowed_ip = limiter.limiter.hit(parsed_limit, "manual", ip)
-        is_allowed_token = limiter.limiter.hit(parsed_limit, "manual", auth_header) if auth_header else True
-        if not is_allowed_ip or not is_allowed_token:
-            raise RateLimitExceeded(limit=limit)
-        return True
-    except RateLimitExceeded as e:
-        raise e
-
-def check_authorization(request: Request) -> bool:
-    rdict = {'status': False}
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.split(" ")[1] != "null":
-        try:
-            rdict["payload"] = authService.decode_token(auth_header.split(" ")[1])
-            rdict["status"] = True
-            return rdict
-        except HTTPException as e:
-            pass
-    return rdict
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    payload = authService.decode_token(token)
+    parsed_limit = parse(limit)
+    # Keyed by a hash of the token subject: one bucket per account however many tokens it holds,
+    # and no bearer tokens or emails stored in the limiter
+    keys = [ip] if payload is None else [ip, subject_key(payload)]
+    for key in keys:
+        if not limiter.limiter.hit(parsed_limit, "manual", key):
+            reset_time = limiter.limiter.get_window_stats(parsed_limit, "manual", key).reset_time
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded: {limit}",
+                headers={"Retry-After": str(max(1, math.ceil(reset_time - time.time())))}
+            )
+    return True
+
+def check_authorization(payload: dict | None = Depends(optional_token_payload)) -> dict:
+    if payload is None:
+        return {'status': False}
+    return {'status': True, 'payload': payload}
+
+def get_current_user(payload: dict = Depends(token_payload)):
     if payload["role"] != 1:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -189,13 +234,22 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 async def lifespan(app: FastAPI):
     # This runs ON STARTUP
     try:
-        print("Initializing Database...")
-        create_dummy()
-        print("Startup complete!")
+        timings = {"imports": imports_done_at - started_at}
+        timings.update(bootstrap())
+        total = time.perf_counter() - started_at
+        app.state.startup = {
+            "total_seconds": round(total, 4),
+            "steps": {name: round(seconds, 4) for name, seconds in timings.items()}
+        }
+        message = f"Startup complete in {total:.2f}s ({format_timings(timings)})"
+        print(message)
+        Config.log(message, "STARTUP")
     except Exception as e:
         print(f"CRITICAL ERROR ON STARTUP: {e}")
         raise e
     yield
+    # This runs ON SHUTDOWN
+    render_jobs.shutdown()
 
 app = FastAPI(title=Config.PROJECT_NAME, lifespan=lifespan)
 app.state.limiter = limiter
@@ -206,14 +260,27 @@ app.add_middleware(
     allow_origins=["*"], 
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+def hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins at once, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
 @app.post('/api/login')
-def login(userlogin: UserLogin):
-    db_user = db.findUser(userlogin.email)
-    if db_user.empty or authService.verify_password(userlogin.password, db_user['password'].loc[0]) is False:
+async def login(userlogin: UserLogin):
+    # Async so that waiting for the hashing pool doesn't hold a request thread
+    db_user = await run_in_threadpool(db.findUser, userlogin.email)
+    try:
+        valid = db_user is not None and await authService.verify_password_async(userlogin.password, db_user['password'])
+    except HashingBusy:
+        raise hashing_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
-    token_data = {"sub": str(db_user["email"].loc[0]), "id": int(db_user["id"].loc[0]), "role": int(db_user["role"].loc[0])}
+    token_data = {"sub": str(db_user["email"]), "id": int(db_user["id"]), "role": int(db_user["role"])}
     token = authService.create_access_token(token_data)
 
     return {
@@ -222,24 +289,27 @@ def login(userlogin: UserLogin):
     }
 
 @app.post('/api/register')
-def register(usercreate: UserCreate, authorize = Depends(check_authorization), _ = Depends(request_limiter)):
+async def register(usercreate: UserCreate, authorize = Depends(check_authorization), _ = Depends(request_limiter)):
     if authorize['status']:
         if authorize["payload"]["role"] == 1:
             raise HTTPException(status_code=403, detail="Authenticated users cannot register new accounts")
     elif usercreate.role == 2 and (not authorize['status'] or authorize.get("payload", {}).get("role") != 2):
         raise HTTPException(status_code=403, detail="Only admins can create admin accounts")
-    elif not db.findUser(usercreate.email).empty:
+    elif await run_in_threadpool(db.findUser, usercreate.email) is not None:
         raise HTTPException(status_code=500, detail="Email already used, please use other email to register new user account.")
-    hashed_password = authService.hash_password(usercreate.password)
+    try:
+        hashed_password = await authService.hash_password_async(usercreate.password)
+    except HashingBusy:
+        raise hashing_busy()
     usercreate.password = hashed_password
 
-    result = db.addUser(usercreate)
+    result = await run_in_threadpool(db.addUser, usercreate)
     if not result:
         raise HTTPException(status_code=400, detail="User registration failed")
     
     if not authorize['status']:
-        db_user = db.findUser(usercreate.email)
-        token_data = {"sub": str(db_user["email"].loc[0]), "id": int(db_user["id"].loc[0]), "role": int(db_user["role"].loc[0])}
+        db_user = await run_in_threadpool(db.findUser, usercreate.email)
+        token_data = {"sub": str(db_user["email"]), "id": int(db_user["id"]), "role": int(db_user["role"])}
         token = authService.create_access_token(token_data)
         return {
             "access_token": token,
@@ -251,9 +321,9 @@ def register(usercreate: UserCreate, authorize = Depends(check_authorization), _
 @app.delete('/api/user/delete/{user_id}')
 def delete_user(user_id: int, user_data: str = Depends(get_current_admin)):
     result = db.findUserById(user_id)
-    if result.empty:
+    if result is None:
         raise HTTPException(status_code=404, detail="User not found")
-    if int(result["role"].iloc[0]) == 2 and user_data["role"] != 2:
+    if int(result["role"]) == 2 and user_data["role"] != 2:
         raise HTTPException(status_code=403, detail="Unauthorized to delete admin user")
     deleted_rows = db.delUser(user_id)
     if deleted_rows and deleted_rows > 0:
@@ -262,49 +332,148 @@ def delete_user(user_id: int, user_data: str = Depends(get_current_admin)):
         raise HTTPException(status_code=500, detail="Failed to delete user")
 
 @app.post('/api/model/upload')
-def upload_model(data: Image_ModelUpload, user_data: str = Depends(get_current_admin)):
+def upload_model(data: Image_ModelUpload, background_tasks: BackgroundTasks, user_data: str = Depends(get_current_admin)):
     
     try:
-        pixel_matrix = decode_base64_to_cv2(data.base64_image)
-    
-        if pixel_matrix is None:
-            raise HTTPException(status_code=400, detail="Invalid image data")
+        img_bytes = decode_base64(data.base64_image)
+        if len(img_bytes) > Config.MODEL_UPLOAD_MAX_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds the limit of {Config.MODEL_UPLOAD_MAX_MB} MB")
+        validate_model_image(io.BytesIO(img_bytes))
 
-        file_path = save_model_to_disk(data.base64_image, data.model_name)
+        file_path = save_model_to_disk(img_bytes)
         model_id = db.addImageModel(data.model_name, file_path, user_data["id"])
+        if model_id is None:
+            delete_model_from_disk(file_path)
+            raise HTTPException(status_code=500, detail="Failed to save model")
+        background_tasks.add_task(generate_model_previews, model_id, file_path)
         return {"status": "success", "model_id": model_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post('/api/model/upload/file')
+async def upload_model_file(request: Request, background_tasks: BackgroundTasks, user_data: str = Depends(get_current_admin)):
+    """Multipart variant of /api/model/upload: form fields model_name and file."""
+    form = await read_capped_form(request, Config.MODEL_UPLOAD_MAX_MB * 1024 * 1024)
+    try:
+        model_name, upload = form.get("model_name"), form.get("file")
+        if not isinstance(model_name, str) or not model_name.strip():
+            raise HTTPException(status_code=422, detail="model_name is required")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=422, detail="file is required")
+
+        model_id, file_path = await run_in_threadpool(store_model_upload, upload.file, model_name, user_data["id"])
+        background_tasks.add_task(generate_model_previews, model_id, file_path)
+        return {"status": "success", "model_id": model_id}
+    finally:
+        await form.close()
     
+def preview_size(size: int | None = Query(None, description="Longest side of a WebP preview instead of the original: 256 or 1024")) -> int | None:
+    if size is not None and size not in thumbnail_service.SIZES:
+        raise HTTPException(status_code=422, detail=f"size must be one of {', '.join(map(str, thumbnail_service.SIZES))}")
+    return size
+
+def serve_file(request: Request, file_path: str, size: int | None = None) -> Response:
+    try:
+        if size is not None:
+            file_path = thumbnail_service.get(file_path, size)
+        return file_service.response(request, file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Failed to generate preview")
+
+def signed_file_url(kind: str, item_id: int, size: int | None = None) -> dict:
+    expires, signature = file_service.sign(kind, item_id)
+    url = f"/api/files/{kind}/{item_id}?expires={expires}&signature={signature}"
+    if size is not None:
+        url += f"&size={size}"
+    return {"url": url, "expires": expires}
+
 @app.get('/api/model/file/{model_id}')
-async def get_model_file(model_id: int, token: str = Depends(oauth2_scheme)):
-    authService.decode_token(token)
-    row = db.findImageModel(model_id)[["model_path"]]
+def get_model_file(model_id: int, request: Request, size: int | None = Depends(preview_size), user_data: dict = Depends(token_payload)):
+    row = db.findImageModel(model_id)
 
-    if row.empty:
+    if row is None:
         raise HTTPException(status_code=404, detail="Model not found")
     
-    file_path = row.loc[0].values[0]
+    file_path = row["model_path"]
+
+    return serve_file(request, file_path, size)
+
+@app.get('/api/model/file/{model_id}/url')
+def get_model_file_url(model_id: int, size: int | None = Depends(preview_size), user_data: dict = Depends(token_payload)):
+    if db.findImageModel(model_id) is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return signed_file_url("model", model_id, size)
 
-    return FileResponse(file_path)
+def list_etag(table: str, *params) -> str | None:
+    """Weak ETag for a listing, derived from the table's change counter and the request parameters."""
+    version = db.getTableVersion(table)
+    if version is None:
+        return None
+    digest = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()[:16]
+    return f'W/"{table.lower()}-{version}-{digest}"'
+
+def list_response(request: Request, etag: str | None, load) -> Response:
+    """
+    Answers 304 when the client already holds the current listing, so unchanged lists cost one
+    counter lookup. Otherwise load() returns (items, next_cursor) for the JSON array response.
+    """
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag is not None:
+        headers["ETag"] = etag
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    items, next_cursor = load()
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(items, headers=headers)
+
+def page_cursor(after: str | None):
+    try:
+        return decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get('/api/model/all')
-def get_all_models(user_data: str = Depends(oauth2_scheme)):
-    models = db.getAllImageModels()[['id', 'model_name', 'created_at', 'user_id']]
-    return models.to_dict(orient='records')
+def get_all_models(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=500, description="Page size; the whole list is returned when omitted"),
+    after: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    user_data: dict = Depends(token_payload)
+):
+    cursor = page_cursor(after)
+    # Read the version before the rows, so a concurrent write can only make the ETag older than the data
+    etag = list_etag("Models", limit, after)
+
+    def load():
+        if limit is None:
+            return records(db.getAllImageModels() or [], 'id', 'model_name', 'created_at', 'user_id'), None
+        page = page_response(db.pageImageModels(limit + 1, cursor), limit, "id")
+        return page["items"], page["next_cursor"]
+
+    return list_response(request, etag, load)
 
 @app.delete('/api/model/delete/{model_id}')
 def delete_model_by_id(model_id: int, user_data: str = Depends(get_current_admin)):
-    result = db.findImageModel(model_id)[["model_path", "user_id"]]
-    if result.empty:
+    result = db.findImageModel(model_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="Model not found")
     
-    model_path, user_id = result.loc[0].values
+    model_path, user_id = result["model_path"], result["user_id"]
 
     if (int(user_id) != user_data["id"]) and user_data["role"] != 2:
         raise HTTPException(status_code=403, detail="Unauthorized access to this data")
 
     delete_success = delete_model_from_disk(model_path)
+    model_cache.invalidate(model_id, model_path)
+    with aggregate_service.lock(model_id):
+        aggregate_service.delete(model_id)
+        db.delAggregateSessionsByModel(model_id)
+    render_cache.invalidate(f"model{model_id}")
     if delete_success :
         deleted_rows = db.delImageModel(model_id)
         if deleted_rows and deleted_rows > 0:
@@ -315,75 +484,393 @@ def delete_model_by_id(model_id: int, user_data: str = Depends(get_current_admin
         raise HTTPException(status_code=500, detail="Failed to delete model file from disk")
     
 @app.get('/api/model/check/{img_name}')
-def check_heatmaps_by_user(img_name:str, token: str = Depends(oauth2_scheme)):
-    authService.decode_token(token)
+def check_heatmaps_by_user(img_name:str, user_data: dict = Depends(token_payload)):
     
-    heatmaps: pd.DataFrame = db.findImageModelByName(img_name)[['id', 'model_name', 'created_at']]
-    return {"status": img_name in heatmaps["model_name"].values}
+    return {"status": bool(db.existsImageModelName(img_name))}
+
+def sync_model_aggregate(model_id: int) -> None:
+    """
+    Adds every stored session of the model that is not yet part of its aggregate grid.
+    A grid that went missing (lost volume, manual cleanup) is rebuilt from all sessions,
+    since its AggregateSessions rows no longer describe anything on disk.
+    """
+    with aggregate_service.lock(model_id):
+        if not aggregate_service.grid_path(model_id).exists():
+            db.delAggregateSessionsByModel(model_id)
+        pending = db.findUnaggregatedSessions(model_id)
+        if not pending:
+            return
+        aggregate_service.apply(model_id, [
+            (row["samples_path"], (int(row["width"]), int(row["height"])))
+            for row in pending
+        ])
+        for row in pending:
+            db.addAggregateSession(int(row["id"]), model_id)
+
+def remove_from_model_aggregate(session_id: int, model_id: int, samples_path: str, dispsize: tuple[int, int]) -> None:
+    """
+    Subtracts a session from its model's aggregate grid, if it was added to it, and deletes its
+    GazeSamples row under the same lock, so a concurrent sync never sees it as unaggregated again.
+    """
+    with aggregate_service.lock(model_id):
+        row = db.findAggregateSession(session_id)
+        if row is not None:
+            aggregate_service.apply(model_id, [(samples_path, dispsize)], sign=-1)
+            db.delAggregateSession(session_id)
+        db.delGazeSamples(session_id)
+
+def record_session(name: str, model_id: int, user_id: int, width: int, height: int,
+                   file_path: str, samples_path: str, point_count: int) -> int | None:
+    """
+    Stores the rows of a rendered session and folds it into its model's aggregate.
+    Returns None when the rows could not be stored; the heatmap image reference and the
+    samples file are released then, since nothing points at them.
+    """
+    img_id = db.addHeatmap(name, file_path, model_id, user_id)
+    if img_id is None or db.addGazeSamples(img_id, samples_path, point_count, width, height) is None:
+        Config.log(f"Failed to store session {name} of model {model_id}", "QUERYERROR")
+        if img_id is not None:
+            db.delHeatmap(img_id)
+        delete_heatmap_from_disk(file_path)
+        gaze_service.delete(samples_path)
+        return None
 
-@app.post('/api/heatmap/upload')
-def upload_heatmap(data: HeatmapUpload, token: str = Depends(oauth2_scheme)):
-    authService.decode_token(token)
-    
     try:
-        formatted_points = [[p.x, p.y, 1] for p in data.points]
-        len_point = len(formatted_points)
+        sync_model_aggregate(model_id)
+    except Exception as e:
+        Config.log(f"Failed to update aggregate of model {model_id}: {e}", "AGGREGATEERROR")
+    return img_id
 
-        model_path = db.findImageModel(data.model_id)[["model_path"]].loc[0].values[0]
-        if not model_path or not Path(model_path).exists():
-            raise HTTPException(status_code=404, detail="Model not found")
+def finish_render_job(job_id: str, data: HeatmapSession, samples_path: str, point_count: int, future: Future):
+    """
+    Records the outcome of a render job once its worker process is done.
+    Runs on the job service's callback threads, where exceptions are only logged, so every path
+    ends with the job updated.
+    """
+    try:
+        file_path, previews = future.result()
+    except Exception as e:
+        Config.log(f"Render job {job_id} failed: {e}", "RENDERERROR")
+        gaze_service.delete(samples_path)
+        db.updateRenderJob(job_id, "failed", detail=str(e))
+        return
 
-        model_data = cv2.imread(Path(model_path), cv2.IMREAD_COLOR)
+    try:
+        img_id = record_session(data.name, data.model_id, data.user_id, data.width, data.height,
+                                file_path, samples_path, point_count)
+    except Exception as e:
+        Config.log(f"Failed to record render job {job_id}: {e}", "RENDERERROR")
+        img_id = None
+    if img_id is None:
+        db.updateRenderJob(job_id, "failed", detail="Failed to store the rendered session")
+        return
+    db.updateRenderJob(job_id, "done", session_id=img_id)
+    # Encoded only now, so previews never delay the result nor take a render queue slot
+    thumbnail_service.write_quietly(file_path, previews)
+
+def finalize_stream(start: HeatmapStreamStart, stream: GazeStream, model_path: str) -> tuple[dict, Callable[[], None]]:
+    """
+    Saves a streamed session and renders it from the already accumulated count grid.
+    Returns the result message and a callable that writes the session's previews, to run once the client has it.
+    """
+    background = model_cache.get(start.model_id, model_path)
+    if background is None:
+        raise ValueError("Invalid image data")
+
+    samples_path = gaze_service.save(start.user_id, stream.samples(), start.name)
+    composite = heatmap_service.compose_heatmap_from_grid(stream.grid, background_img=background)
+    file_path = save_heatmap_to_disk(heatmap_service.encode_png(composite))
+
+    img_id = record_session(start.name, start.model_id, start.user_id, start.width, start.height,
+                            file_path, samples_path, stream.point_count)
+    if img_id is None:
+        raise ValueError("Failed to store the session")
+    result = {"status": "success", "point_count": stream.point_count, "session_id": img_id}
+    return result, partial(thumbnail_service.generate_quietly, file_path, composite)
+
+@app.get('/api/model/aggregate/{model_id}')
+def render_model_aggregate(
+    model_id: int,
+    colormap: str = 'turbo',
+    alpha: float = Query(0.8, ge=0.0, le=1.0),
+    threshold: float = Query(heatmap_service.THRESHOLD, ge=0.0),
+    sigma: float = Query(heatmap_service.sigma, gt=0.0, le=500.0),
+    width: int | None = Query(None, ge=16),
+    user_ids: str | None = Query(None, description="Comma separated user ids to restrict the aggregate to"),
+    user_data: str = Depends(get_current_admin)
+):
+    model = db.findImageModel(model_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    model_path = model["model_path"]
 
-        if model_data is None:
-            raise HTTPException(status_code=400, detail="Invalid image data")
+    if colormap not in heatmap_service.COLORMAPS:
+        raise HTTPException(status_code=400, detail=f"Unknown colormap, use one of: {', '.join(heatmap_service.COLORMAPS)}")
+
+    if user_ids:
+        try:
+            selected_users = sorted({int(u) for u in user_ids.split(",") if u.strip()})
+        except ValueError:
+            raise HTTPException(status_code=400, detail="user_ids must be a comma separated list of ids")
+        sessions = db.findSessionSamplesByModel(model_id, selected_users)
+        if not sessions:
+            raise HTTPException(status_code=404, detail="No sessions found for these users")
+        grid_width, grid_height = int(sessions[0]["width"]), int(sessions[0]["height"])
+        version = (tuple(selected_users), tuple(int(row["id"]) for row in sessions))
+    else:
+        sync_model_aggregate(model_id)
+        grid = aggregate_service.load(model_id)
+        if grid is None:
+            raise HTTPException(status_code=404, detail="No sessions recorded for this model yet")
+        grid_height, grid_width = grid.shape
+        version = aggregate_service.grid_path(model_id).stat().st_mtime_ns
+
+    if width is not None and width >= grid_width:
+        width = None
+
+    key = render_cache.make_key(f"model{model_id}", model_path, version, colormap, alpha, threshold, sigma, width)
+    cached_path = render_cache.get(key)
+    if cached_path is not None:
+        return FileResponse(cached_path, media_type="image/png")
+
+    if user_ids:
+        grid = np.zeros((grid_height, grid_width), dtype=np.float32)
+        for row in sessions:
+            grid += aggregate_service.bin_session(
+                row["samples_path"], (int(row["width"]), int(row["height"])), (grid_width, grid_height)
+            )
+
+    heatmap_img = heatmap_service.create_heatmap_from_grid(
+        grid,
+        background_img=model_cache.get(model_id, model_path),
+        alpha=alpha,
+        threshold=threshold,
+        colormap=colormap,
+        sigma=sigma,
+        out_width=width
+    )
+    render_cache.put(key, heatmap_img)
+
+    return Response(content=bytes(heatmap_img), media_type="image/png")
+
+def enqueue_render(data: HeatmapSession, samples: np.ndarray) -> dict:
+    """Stores the samples of an uploaded session and queues its render job."""
+    len_point = len(samples)
+
+    model = db.findImageModel(data.model_id)
+    model_path = None if model is None else model["model_path"]
+    if not model_path or not Path(model_path).exists():
+        raise HTTPException(status_code=404, detail="Model not found")
 
-        heatmap_img = heatmap_service.create_heatmap(
-            gazepoints=formatted_points,
-            dispsize=(data.width, data.height),
-            background_img=model_data
+    samples_path = gaze_service.save(data.user_id, samples, data.name)
+
+    job_id = uuid.uuid4().hex
+    db.addRenderJob(job_id, data.user_id, len_point)
+    try:
+        render_jobs.submit(
+            render_session,
+            samples_path, (data.width, data.height), data.model_id, model_path,
+            on_done=lambda future: finish_render_job(job_id, data, samples_path, len_point, future)
+        )
+    except JobQueueFull:
+        db.delRenderJob(job_id)
+        gaze_service.delete(samples_path)
+        raise HTTPException(
+            status_code=503,
+            detail="Render queue is full, please retry shortly",
+            headers={"Retry-After": "5"}
         )
 
-        file_path = save_heatmap_to_disk(data.user_id, heatmap_img, data.name)
+    return {"status": "queued", "job_id": job_id, "point_count": len_point}
 
-        img_id = db.addHeatmap(data.name, file_path, data.model_id, data.user_id)
+@app.post('/api/heatmap/upload', status_code=202)
+def upload_heatmap(data: HeatmapUpload, user_data: dict = Depends(token_payload)):
+    
+    try:
+        samples = gaze_service.pack_points(data.points)
+        return enqueue_render(HeatmapSession(**data.model_dump(exclude={"points"})), samples)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        Config.log(f"Failed to queue upload {data.name}: {e}", "UPLOADERROR")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {"status": "success", "point_count": len_point, "session_id": img_id}
+@app.post('/api/heatmap/upload/binary', status_code=202)
+async def upload_heatmap_binary(request: Request, data: HeatmapSession = Depends(), user_data: dict = Depends(token_payload)):
+    """
+    Same as /api/heatmap/upload, but the session fields come as query parameters and the
+    body is application/octet-stream of packed little-endian (int16 x, int16 y, float32 weight) records.
+    """
+    body = await read_capped_body(
+        request,
+        Config.SESSION_MAX_POINTS * gaze_service.WIRE_DTYPE.itemsize,
+        HTTPException(status_code=413, detail=f"Session exceeds the limit of {Config.SESSION_MAX_POINTS} points")
+    )
+
+    try:
+        samples = gaze_service.unpack(body, (data.width, data.height))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return await run_in_threadpool(enqueue_render, data, samples)
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        print(e)
+        Config.log(f"Failed to queue binary upload {data.name}: {e}", "UPLOADERROR")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.websocket('/api/heatmap/stream')
+async def stream_heatmap(websocket: WebSocket):
+    """
+    Live ingestion of a recording session.
+    Protocol: the client first sends HeatmapStreamStart (including its JWT) as JSON,
+    then any number of batches, either JSON {"points": [...]} or binary frames in the
+    /api/heatmap/upload/binary encoding, and finally {"type": "end"}.
+    The server answers with the same result as a finished upload and closes.
+    Only an ended stream is saved: {"type": "abort"} or a dropped connection discards it,
+    and the client, which still holds every point, uploads the session in one piece instead.
+    """
+    await websocket.accept()
+    try:
+        start = HeatmapStreamStart.model_validate(await websocket.receive_json())
+        payload = authService.decode_token(start.token)
+    except (ValidationError, ValueError) as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid stream header")
+        return
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail)[:120])
+        return
+    except WebSocketDisconnect:
+        return
+
+    if start.user_id != payload["id"] and payload["role"] != 2:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unauthorized access to this data")
+        return
+
+    model = await run_in_threadpool(db.findImageModel, start.model_id)
+    model_path = None if model is None else model["model_path"]
+    if not model_path or not Path(model_path).exists():
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Model not found")
+        return
+
+    stream = GazeStream((start.width, start.height), Config.SESSION_MAX_POINTS)
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                if frame.get("bytes") is not None:
+                    stream.add_samples(gaze_service.unpack(frame["bytes"], stream.dispsize))
+                    continue
+
+                message = json.loads(frame["text"])
+                if not isinstance(message, dict):
+                    raise ValueError("Expected a JSON object")
+                message_type = message.get("type")
+                if message_type == "end":
+                    break
+                if message_type == "abort":
+                    await websocket.close()
+                    return
+                batch = HeatmapStreamBatch.model_validate(message)
+                stream.add_samples(gaze_service.pack_points(batch.points))
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"status": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        # Saving the partial session here would duplicate the client's fallback upload
+        return
+
+    if stream.point_count == 0:
+        await websocket.send_json({"status": "error", "detail": "No gaze points received"})
+        await websocket.close()
+        return
+
+    previews = None
+    try:
+        result, previews = await run_in_threadpool(finalize_stream, start, stream, model_path)
+    except Exception as e:
+        Config.log(f"Failed to finalize streamed session {start.name}: {e}", "STREAMERROR")
+        result = {"status": "error", "detail": str(e)}
+
+    try:
+        await websocket.send_json(result)
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    if previews is not None:
+        await run_in_threadpool(previews)
+
+@app.get('/api/heatmap/job/{job_id}')
+def get_render_job(job_id: str, include_image: bool = False, user_data: dict = Depends(token_payload)):
+    job = db.findRenderJob(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if (int(job["user_id"]) != user_data["id"]) and user_data["role"] != 2:
+        raise HTTPException(status_code=403, detail="Unauthorized access to this data")
+
+    session_id = job["session_id"]
+    result = {
+        "job_id": job_id,
+        "status": job["status"],
+        "point_count": job["point_count"],
+        "session_id": session_id,
+        "detail": job["detail"]
+    }
+    if include_image and session_id is not None:
+        heatmap = db.findHeatmap(session_id)
+        if heatmap is not None:
+            result["image"] = base64.b64encode(Path(heatmap["image_path"]).read_bytes()).decode('utf-8')
+    return result
     
 @app.get('/api/heatmap/get_by_user/{user_id}')
-def get_heatmaps_by_user(user_id: int, token: str = Depends(oauth2_scheme)):
-    user_data = authService.decode_token(token)
+def get_heatmaps_by_user(
+    request: Request,
+    user_id: int,
+    limit: int | None = Query(None, ge=1, le=500, description="Page size; the whole list is returned when omitted"),
+    after: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    user_data: dict = Depends(token_payload)
+):
     user_id = user_data.get("id")
-    
-    heatmaps = db.findHeatmapByUserID(user_id)[['id', 'img_name', 'created_at']]
-    return heatmaps.to_dict(orient='records')
+    cursor = page_cursor(after)
+    etag = list_etag("Heatmaps", user_id, limit, after)
+
+    def load():
+        if limit is None:
+            return records(db.findHeatmapByUserID(user_id) or [], 'id', 'img_name', 'created_at'), None
+        page = page_response(db.pageHeatmapsByUserID(user_id, limit + 1, cursor), limit, "id")
+        return page["items"], page["next_cursor"]
+
+    return list_response(request, etag, load)
 
 @app.get('/api/heatmap/check/{user_id}/{img_name}')
-def check_heatmaps_by_user(user_id: int, img_name:str, token: str = Depends(oauth2_scheme)):
-    user_data = authService.decode_token(token)
+def check_heatmaps_by_user(user_id: int, img_name:str, user_data: dict = Depends(token_payload)):
     user_id = user_data.get("id")
     
-    heatmaps: pd.DataFrame = db.findHeatmapByUserID(user_id)[['id', 'img_name', 'created_at']]
-    return {"status": img_name in heatmaps["img_name"].values}
+    return {"status": bool(db.existsHeatmapName(user_id, img_name))}
 
 @app.delete('/api/heatmap/delete/{session_id}')
-def delete_heatmap_by_sessionid(session_id: int, token: str = Depends(oauth2_scheme)):
-    user_data = authService.decode_token(token)
-    result = db.findHeatmap(session_id)[["image_path", "user_id"]]
+def delete_heatmap_by_sessionid(session_id: int, user_data: dict = Depends(token_payload)):
+    result = db.findHeatmap(session_id)
     
-    if result.empty:
+    if result is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    image_path, user_id = result.loc[0].values
+    image_path, user_id, model_id = result["image_path"], result["user_id"], result["model_id"]
 
     if (int(user_id) != user_data["id"]) and user_data["role"] != 2:
         raise HTTPException(status_code=403, detail="Unauthorized access to this data")
 
     delete_success = delete_heatmap_from_disk(image_path)
     if delete_success :
+        samples = db.findGazeSamples(session_id)
+        if samples is not None:
+            remove_from_model_aggregate(session_id, int(model_id), samples["samples_path"], (samples["width"], samples["height"]))
+            gaze_service.delete(samples["samples_path"])
+        render_cache.invalidate(session_id)
         deleted_rows = db.delHeatmap(session_id)
         if deleted_rows and deleted_rows > 0:
             return {"status": "deleted"}
@@ -393,23 +880,101 @@ def delete_heatmap_by_sessionid(session_id: int, token: str = Depends(oauth2_sch
         raise HTTPException(status_code=500, detail="Failed to delete heatmap file from disk")
 
 @app.get("/api/heatmaps/file/{session_id}")
-async def get_heatmap_file(session_id: int, token: str = Depends(oauth2_scheme)):
-    user_data = authService.decode_token(token)
-    row = db.findHeatmap(session_id)[["image_path", "user_id"]].loc[0].values
+def get_heatmap_file(session_id: int, request: Request, size: int | None = Depends(preview_size), user_data: dict = Depends(token_payload)):
+    row = db.findHeatmap(session_id)
 
-    if row.size == 0:
+    if row is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    file_path, owner_id = row
+    file_path, owner_id = row["image_path"], row["user_id"]
+
+    if (int(owner_id) != user_data["id"]) and user_data["role"] != 2:
+        raise HTTPException(status_code=403, detail="Unauthorized access to this data")
+
+    return serve_file(request, file_path, size)
+
+@app.get("/api/heatmaps/file/{session_id}/url")
+def get_heatmap_file_url(session_id: int, size: int | None = Depends(preview_size), user_data: dict = Depends(token_payload)):
+    row = db.findHeatmap(session_id)
+
+    if row is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    if (int(row["user_id"]) != user_data["id"]) and user_data["role"] != 2:
+        raise HTTPException(status_code=403, detail="Unauthorized access to this data")
+
+    return signed_file_url("heatmap", session_id, size)
+
+@app.get("/api/files/{kind}/{item_id}")
+def get_signed_file(kind: Literal["model", "heatmap"], item_id: int, expires: int, signature: str, request: Request,
+                    size: int | None = Depends(preview_size)):
+    """Serves a file through a URL from the /url endpoints; the signature replaces the bearer token."""
+    if not file_service.verify(kind, item_id, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired file URL")
+
+    row = db.findImageModel(item_id) if kind == "model" else db.findHeatmap(item_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return serve_file(request, row["model_path"] if kind == "model" else row["image_path"], size)
+
+@app.get("/api/heatmaps/render/{session_id}")
+def render_heatmap(
+    session_id: int,
+    colormap: str = 'turbo',
+    alpha: float = Query(0.8, ge=0.0, le=1.0),
+    threshold: float = Query(heatmap_service.THRESHOLD, ge=0.0),
+    sigma: float = Query(heatmap_service.sigma, gt=0.0, le=500.0),
+    width: int | None = Query(None, ge=16),
+    user_data: dict = Depends(token_payload)
+):
+    result = db.findHeatmap(session_id)
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    model_id, owner_id = result["model_id"], result["user_id"]
 
     if (int(owner_id) != user_data["id"]) and user_data["role"] != 2:
         raise HTTPException(status_code=403, detail="Unauthorized access to this data")
 
-    return FileResponse(file_path)
+    if colormap not in heatmap_service.COLORMAPS:
+        raise HTTPException(status_code=400, detail=f"Unknown colormap, use one of: {', '.join(heatmap_service.COLORMAPS)}")
+
+    samples_row = db.findGazeSamples(session_id)
+    if samples_row is None:
+        raise HTTPException(status_code=404, detail="No gaze samples stored for this session")
+
+    samples_path, samples_width, samples_height = samples_row["samples_path"], samples_row["width"], samples_row["height"]
+    if width is not None and width >= samples_width:
+        width = None
+
+    model = db.findImageModel(int(model_id))
+    model_path = model["model_path"] if model is not None else None
+
+    key = render_cache.make_key(session_id, samples_path, model_path, colormap, alpha, threshold, sigma, width)
+    cached_path = render_cache.get(key)
+    if cached_path is not None:
+        return FileResponse(cached_path, media_type="image/png")
+
+    background = model_cache.get(int(model_id), model_path) if model_path else None
+
+    heatmap_img = heatmap_service.create_heatmap(
+        gazepoints=gaze_service.as_weighted_points(gaze_service.load(samples_path)),
+        dispsize=(samples_width, samples_height),
+        background_img=background,
+        alpha=alpha,
+        threshold=threshold,
+        colormap=colormap,
+        sigma=sigma,
+        out_width=width
+    )
+    render_cache.put(key, heatmap_img)
+
+    return Response(content=bytes(heatmap_img), media_type="image/png")
 
 @app.get('/api/verify-token')
-def verify_token(token: str = Depends(oauth2_scheme)):
-    payload = authService.decode_token(token)
+def verify_token(payload: dict = Depends(token_payload)):
     return {"payload": payload}
 
 
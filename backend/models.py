@@ -17,13 +17,24 @@ class UserLogin(BaseModel):
 class GazePoint(BaseModel):
     x: int
     y: int
+    t: Optional[float] = None  # seconds since recording started
 
-class HeatmapUpload(BaseModel):
+class HeatmapSession(BaseModel):
     name: str
     model_id: int
     user_id: int
     width: int
     height: int
+
+class HeatmapUpload(HeatmapSession):
+    points: List[GazePoint]
+
+class HeatmapStreamStart(HeatmapSession):
+    token: str
+    width: int = Field(..., gt=0)
+    height: int = Field(..., gt=0)
+
+class HeatmapStreamBatch(BaseModel):
     points: List[GazePoint]
 
 class HeatmapGet(BaseModel):
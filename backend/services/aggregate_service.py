@@ -0,0 +1,73 @@
+from __future__ import annotations
+from pathlib import Path
+from config import Config
+from services.gaze_service import gaze_service
+from services.heatpmap_service import heatmap_service
+from services.storage_service import atomic_writer, file_lock
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+
+class AggregateService:
+    """
+    Keeps one running, unsmoothed float32 count grid per model on disk.
+    Sessions are added or subtracted as they come and go; since the gaussian
+    smoothing is linear, rendering the aggregate is a single convolution no
+    matter how many sessions contributed.
+    """
+
+    def __init__(self, aggregate_dir: Path):
+        self.aggregate_dir = aggregate_dir
+
+    def grid_path(self, model_id: int) -> Path:
+        return self.aggregate_dir / f"model_{model_id}.npy"
+
+    def lock(self, model_id: int):
+        """Serializes updates of a model's grid across threads and workers."""
+        return file_lock(self.aggregate_dir / f"model_{model_id}.lock")
+
+    def load(self, model_id: int) -> np.ndarray | None:
+        path = self.grid_path(model_id)
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def bin_session(self, samples_path: str, dispsize: tuple[int, int], grid_size: tuple[int, int]) -> np.ndarray:
+        """Bins a stored session into a count grid of grid_size, rescaling if the sizes differ."""
+        points = gaze_service.as_weighted_points(gaze_service.load(samples_path)).astype(np.float64)
+        if tuple(dispsize) != tuple(grid_size):
+            points[:, 0] *= grid_size[0] / dispsize[0]
+            points[:, 1] *= grid_size[1] / dispsize[1]
+        return heatmap_service.bin_points(points, grid_size)
+
+    def apply(self, model_id: int, sessions: list[tuple[str, tuple[int, int]]], sign: int = 1) -> None:
+        """
+        Adds (sign=1) or subtracts (sign=-1) sessions, given as (samples_path, (width, height)),
+        to the model's grid. Must be called while holding lock(model_id).
+        """
+        if not sessions:
+            return
+
+        path = self.grid_path(model_id)
+        if path.exists():
+            grid = np.load(path)
+        elif sign > 0:
+            width, height = sessions[0][1]
+            grid = np.zeros((height, width), dtype=np.float32)
+        else:
+            return
+
+        grid_size = (grid.shape[1], grid.shape[0])
+        for samples_path, dispsize in sessions:
+            grid += sign * self.bin_session(samples_path, dispsize, grid_size)
+        if sign < 0:
+            np.maximum(grid, 0, out=grid)
+
+        self.aggregate_dir.mkdir(parents=True, exist_ok=True)
+        with atomic_writer(path) as f:
+            np.save(f, grid, allow_pickle=False)
+
+    def delete(self, model_id: int) -> None:
+        self.grid_path(model_id).unlink(missing_ok=True)
+
+aggregate_service = AggregateService(Config.AGGREGATE_PATH)
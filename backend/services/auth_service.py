@@ -1,4 +1,11 @@
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 import jwt
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
@@ -7,10 +14,105 @@ from config import Config
 
 
 
+class HashingBusy(Exception):
+    """Raised when a password hash is refused because the hashing queue is full or too slow."""
+
+class HashingPool:
+    """
+    Runs bcrypt on its own small thread pool (bcrypt releases the GIL), so a burst of logins
+    waits here instead of occupying the request threadpool that every other sync endpoint needs.
+    At most workers + max_queue hashes are admitted; one that waited longer than queue_timeout
+    to start is dropped, since its client has most likely given up by then.
+    """
+
+    def __init__(self, workers: int, max_queue: int, queue_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"completed": 0, "rejected": 0, "timed_out": 0, "failed": 0, "cancelled": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    async def run(self, fn: Callable, *args):
+        """Runs fn(*args) on the pool. Raises HashingBusy when it is refused."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise HashingBusy()
+        with self._lock:
+            self._in_flight += 1
+        queued_at = time.monotonic()
+        # Stays "cancelled" when the future is cancelled before the task starts
+        state = {"outcome": "cancelled", "waited": 0.0, "ran": 0.0}
+
+        def task():
+            started = time.monotonic()
+            state["waited"] = started - queued_at
+            state["outcome"] = "completed"
+            try:
+                if state["waited"] > self.queue_timeout:
+                    state["outcome"] = "timed_out"
+                    raise HashingBusy()
+                try:
+                    return fn(*args)
+                except BaseException:
+                    state["outcome"] = "failed"
+                    raise
+            finally:
+                state["ran"] = time.monotonic() - started
+
+        def done(_):
+            # Runs once the task finished or once the future was cancelled (the awaiting request
+            # went away), so the slot is returned either way
+            with self._lock:
+                self._in_flight -= 1
+                self._counts[state["outcome"]] += 1
+                self._wait_total += state["waited"]
+                self._wait_max = max(self._wait_max, state["waited"])
+                self._run_total += state["ran"]
+            self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            finished = sum(self._counts[k] for k in ("completed", "timed_out", "failed"))
+            ran = self._counts["completed"] + self._counts["failed"]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "in_flight": self._in_flight,
+                **self._counts,
+                "avg_wait_ms": round(self._wait_total / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_hash_ms": round(self._run_total / ran * 1000, 2) if ran else 0.0
+            }
+
 class AuthService():
 
-    def __init__(self):
-        self._pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
+    def __init__(self, cache_size: int = 4096, cache_ttl: float = 60.0, bcrypt_rounds: int = 12,
+                 hashing: HashingPool | None = None):
+        self._pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto", bcrypt__rounds=bcrypt_rounds)
+        self.hashing = hashing
+        # Verified claims by token hash, so repeat requests skip the HMAC check and JWT parsing
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._verified: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
     
     def hash_password(self, password: str) -> str:
         """Converts plain text password to a BCrypt hash."""
@@ -18,8 +120,15 @@ class AuthService():
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Checks if the provided password matches the stored hash."""
-        print(f"DEBUG: Verifying '{plain_password}' against '{hashed_password}'")
         return self._pwd_context.verify(plain_password, hashed_password)
+
+    async def hash_password_async(self, password: str) -> str:
+        """hash_password on the hashing pool. Raises HashingBusy when the pool refuses it."""
+        return await self.hashing.run(self.hash_password, password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password on the hashing pool. Raises HashingBusy when the pool refuses it."""
+        return await self.hashing.run(self.verify_password, plain_password, hashed_password)
     
     def create_access_token(self, data: dict):
         """Creates a JWT token using the secret from config.py."""
@@ -32,13 +141,26 @@ class AuthService():
         return encoded_jwt
     
     def decode_token(self, token: str):
+        """
+        Verifies the token and returns a copy of its claims.
+        Verified claims are cached until cache_ttl passes or the token expires, whichever is first.
+        """
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._verified.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._verified.move_to_end(key)
+                    return dict(entry[1])
+                del self._verified[key]
+
         try:
             payload = jwt.decode(
                 token, 
                 Config.JWT_TOKEN, 
                 algorithms=[Config.ALGORITHM]
             )
-            return payload
         except jwt.ExpiredSignatureError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,8 +171,37 @@ class AuthService():
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token:\n" + e.__str__()
             )
+
+        expires = now + self.cache_ttl
+        if isinstance(payload.get("exp"), (int, float)):
+            expires = min(expires, payload["exp"])
+        with self._lock:
+            self._verified[key] = (expires, payload)
+            self._verified.move_to_end(key)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return dict(payload)
     
 
     
-authService = AuthService()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
\ No newline at end of file
+authService = AuthService(
+    Config.TOKEN_CACHE_SIZE,
+    Config.TOKEN_CACHE_TTL_SECONDS,
+    Config.BCRYPT_ROUNDS,
+    HashingPool(Config.PASSWORD_HASH_WORKERS, Config.PASSWORD_HASH_QUEUE, Config.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+def token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Claims of the request's bearer token. FastAPI resolves a dependency once per request,
+    so the role checks, the rate limiter and the handler all share a single decode.
+    """
+    return authService.decode_token(token)
+
+def optional_token_payload(token: str | None = Depends(optional_oauth2_scheme)) -> dict | None:
+    """Like token_payload, but None when no token was sent (the frontend sends "Bearer null" when logged out)."""
+    if not token or token == "null":
+        return None
+    return authService.decode_token(token)
\ No newline at end of file
@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from config import Config
+
+class FileService:
+    """
+    Serves stored images with HTTP validators. Stored files are content-addressed and never
+    rewritten in place, so a content hash is a stable strong ETag and responses may be
+    cached as immutable.
+    Also signs short-lived URLs that work without an Authorization header, and can hand
+    the byte transfer over to nginx through X-Accel-Redirect.
+    """
+    IMMUTABLE = "private, max-age=31536000, immutable"
+
+    def __init__(self, secret: str, url_ttl: int, accel_redirect: bool, accel_root: Path,
+                 accel_prefix: str, max_digests: int = 4096):
+        # Derived key, so a file signature can never double as anything signed with the JWT secret
+        self._key = hmac.new(secret.encode("utf-8"), b"file-url", hashlib.sha256).digest()
+        self.url_ttl = url_ttl
+        self.accel_redirect = accel_redirect
+        self.accel_root = accel_root.resolve()
+        self.accel_prefix = accel_prefix.rstrip("/") + "/"
+        self.max_digests = max_digests
+        self._digests: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, path: str | Path, stat_result: os.stat_result) -> str:
+        """SHA-256 of the file, computed once per (path, mtime, size)."""
+        key = (str(path), stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            if key in self._digests:
+                self._digests.move_to_end(key)
+                return self._digests[key]
+
+        with open(path, "rb") as f:
+            value = hashlib.file_digest(f, "sha256").hexdigest()
+
+        with self._lock:
+            self._digests[key] = value
+            while len(self._digests) > self.max_digests:
+                self._digests.popitem(last=False)
+        return value
+
+    def sign(self, kind: str, item_id: int) -> tuple[int, str]:
+        """
+        Returns (expires, signature) for a file URL.
+        Expiry is rounded up to the next TTL boundary, so repeated requests within a window
+        produce the same URL and the browser cache can still hit.
+        """
+        expires = int(math.ceil((time.time() + self.url_ttl) / self.url_ttl) * self.url_ttl)
+        return expires, self._signature(kind, item_id, expires)
+
+    def verify(self, kind: str, item_id: int, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(kind, item_id, expires), signature)
+
+    def _signature(self, kind: str, item_id: int, expires: int) -> str:
+        message = f"{kind}:{item_id}:{expires}".encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).hexdigest()
+
+    def _not_modified(self, request: Request, etag: str, mtime: float) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self, request: Request, path: str | Path, media_type: str | None = None,
+                 cache_control: str = IMMUTABLE) -> Response:
+        """
+        Builds a 304, an X-Accel-Redirect, or a FileResponse (which also answers Range requests).
+        Raises FileNotFoundError when the file is gone.
+        """
+        stat_result = os.stat(path)
+        etag = f'"{self.digest(path, stat_result)}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Cache-Control": cache_control
+        }
+        if self._not_modified(request, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        if self.accel_redirect:
+            try:
+                relative = Path(path).resolve().relative_to(self.accel_root)
+            except ValueError:
+                relative = None
+            if relative is not None:
+                headers["X-Accel-Redirect"] = self.accel_prefix + relative.as_posix()
+                return Response(headers=headers, media_type=media_type)
+
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+file_service = FileService(
+    Config.JWT_TOKEN,
+    Config.FILE_URL_TTL_SECONDS,
+    Config.ACCEL_REDIRECT,
+    Config.ACCEL_ROOT,
+    Config.ACCEL_PREFIX
+)
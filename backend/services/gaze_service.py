@@ -0,0 +1,111 @@
+from __future__ import annotations
+import uuid
+from functools import cached_property
+from pathlib import Path
+from config import Config
+from services.storage_service import atomic_writer
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+
+class GazeService:
+    """
+    Stores the raw gaze samples of a session as a packed structured .npy file,
+    so a session can be re-rendered or analysed later without re-recording it.
+    """
+
+    # dtypes are built on first use, which keeps numpy out of the import of this module
+    @cached_property
+    def SAMPLE_DTYPE(self):
+        return np.dtype([
+            ('x', '<i2'),
+            ('y', '<i2'),
+            ('w', '<f4'),
+            ('t', '<f4'),
+        ])
+
+    @cached_property
+    def WIRE_DTYPE(self):
+        """Compact upload encoding: little-endian (x: int16, y: int16, weight: float32) records."""
+        return np.dtype([
+            ('x', '<i2'),
+            ('y', '<i2'),
+            ('w', '<f4'),
+        ])
+
+    def pack(self, xs, ys, weights=None, timestamps=None) -> np.ndarray:
+        """Packs columns into a sample array; missing timestamps are stored as NaN."""
+        xs = np.asarray(xs)
+        samples = np.empty(xs.shape[0], dtype=self.SAMPLE_DTYPE)
+        samples['x'] = np.clip(xs, -32768, 32767)
+        samples['y'] = np.clip(ys, -32768, 32767)
+        samples['w'] = 1.0 if weights is None else weights
+        samples['t'] = np.nan if timestamps is None else timestamps
+        return samples
+
+    def pack_points(self, points) -> np.ndarray:
+        """Packs a list of GazePoint models."""
+        return self.pack(
+            [p.x for p in points],
+            [p.y for p in points],
+            timestamps=[np.nan if p.t is None else p.t for p in points]
+        )
+
+    def unpack(self, buf: bytes, dispsize: tuple[int, int]) -> np.ndarray:
+        """
+        Decodes WIRE_DTYPE records straight into a sample array, without any per-point
+        Python objects. Raises ValueError on a truncated body or on points outside the
+        display / with a non finite or negative weight.
+        """
+        if len(buf) % self.WIRE_DTYPE.itemsize:
+            raise ValueError(f"Body length must be a multiple of {self.WIRE_DTYPE.itemsize} bytes")
+
+        wire = np.frombuffer(buf, dtype=self.WIRE_DTYPE)
+        width, height = dispsize
+        valid = (
+            (wire['x'] >= 0) & (wire['x'] <= width) &
+            (wire['y'] >= 0) & (wire['y'] <= height) &
+            np.isfinite(wire['w']) & (wire['w'] >= 0)
+        )
+        if not valid.all():
+            raise ValueError(f"{np.count_nonzero(~valid)} points are outside the display or have an invalid weight")
+
+        return self.pack(wire['x'], wire['y'], wire['w'])
+
+    def as_weighted_points(self, samples: np.ndarray) -> np.ndarray:
+        """Returns the (x, y, weight) triples expected by HeatmapService."""
+        return np.column_stack((samples['x'], samples['y'], samples['w']))
+
+    def save(self, user_id: int, samples: np.ndarray, session_name: str) -> str:
+        """
+        Saves the samples in a user-specific folder.
+        Returns the relative file path to be stored in the database.
+        """
+        user_dir = Config.GAZE_PATH / f"user_{user_id}"
+        user_dir.mkdir(parents=True, exist_ok=True)
+
+        unique_id = uuid.uuid4().hex
+        filename = f"{unique_id}_{session_name.replace(' ', '_')}.npy"
+        file_path = user_dir / filename
+
+        with atomic_writer(file_path) as f:
+            np.save(f, samples, allow_pickle=False)
+
+        return str(file_path)
+
+    def load(self, file_path: str) -> np.ndarray:
+        """Memory-maps the samples of a session without copying them."""
+        return np.load(file_path, mmap_mode='r')
+
+    def delete(self, file_path: str) -> bool:
+        try:
+            path = Path(file_path)
+            if path.exists():
+                path.unlink()
+                return True
+            return False
+        except Exception as e:
+            Config.log(f"Error deleting file {file_path}: {e}", "FILEDELETEERROR")
+            return False
+
+gaze_service = GazeService()
@@ -1,12 +1,72 @@
-import numpy as np
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+def _build_colormap_lut(colormap: int) -> np.ndarray:
+    """Precomputes a 256-entry BGR lookup table for an OpenCV colormap."""
+    ramp = np.arange(256, dtype=np.uint8).reshape(256, 1)
+    return cv2.applyColorMap(ramp, colormap).reshape(256, 3).astype(np.float32) / 255.0
 
 class HeatmapService:
+    BACKGROUND_ALPHA = 0.8
+    THRESHOLD = 0.5
+    # Smoothing kernels kept per size; sigma comes from clients, so the cache must stay bounded
+    CONV_KERNEL_CACHE_SIZE = 16
+    # Names of the OpenCV colormap constants, resolved when the lookup tables are built
+    COLORMAPS = {
+        'turbo': 'COLORMAP_TURBO',
+        'jet': 'COLORMAP_JET',
+        'viridis': 'COLORMAP_VIRIDIS',
+        'inferno': 'COLORMAP_INFERNO',
+        'magma': 'COLORMAP_MAGMA',
+        'plasma': 'COLORMAP_PLASMA',
+        'hot': 'COLORMAP_HOT',
+    }
+
     def __init__(self, gaussian_wh=200):
         self.gaussian_wh = gaussian_wh
-        self.kernel = self._generate_gaussian_kernel(gaussian_wh, gaussian_wh / 6)
+        self.sigma = gaussian_wh / 6
+        self._conv_kernels: OrderedDict[int, tuple[np.ndarray, int]] = OrderedDict()
+        self._conv_kernels_lock = threading.Lock()
+
+    # The tables and the default kernel are built on first use, so importing the service stays cheap
+    @cached_property
+    def luts(self):
+        return {name: _build_colormap_lut(getattr(cv2, cmap)) for name, cmap in self.COLORMAPS.items()}
+
+    @cached_property
+    def kernel(self):
+        return self._generate_gaussian_kernel(self.gaussian_wh, self.sigma)
+
+    def _get_conv_kernel(self, sigma):
+        """
+        Returns the (1-D kernel, anchor) pair for a sigma, covering +-3 sigma like the default kernel.
+        The gaussian is separable, so smoothing is a row pass and a column pass with this kernel and
+        memory stays O(size) whatever sigma a client asks for.
+        The kernel is flipped so cv2.sepFilter2D (a correlation) behaves as a convolution.
+        """
+        size = max(1, int(round(6 * sigma)))
+        with self._conv_kernels_lock:
+            entry = self._conv_kernels.get(size)
+            if entry is not None:
+                self._conv_kernels.move_to_end(size)
+                return entry
+
+        sd = size / 6
+        offsets = np.arange(0, size) - size / 2
+        kernel = np.exp(-1.0 * (offsets**2 / (2 * sd**2)))
+        anchor = size - 1 - size // 2
+        entry = (np.ascontiguousarray(kernel[::-1], dtype=np.float32), anchor)
+        with self._conv_kernels_lock:
+            self._conv_kernels[size] = entry
+            while len(self._conv_kernels) > self.CONV_KERNEL_CACHE_SIZE:
+                self._conv_kernels.popitem(last=False)
+        return entry
 
     def _generate_gaussian_kernel(self, size, sd):
         """Vectorized Gaussian generation (much faster than nested loops)"""
@@ -19,52 +79,160 @@ class HeatmapService:
         kernel = np.exp(-1.0 * (((x - xo)**2 / (2 * sd**2)) + ((y - yo)**2 / (2 * sd**2))))
         return kernel
 
-    def create_heatmap(self, gazepoints, dispsize, background_img=None, alpha=0.6):
+    def _points_inside(self, gazepoints, width, height):
         """
-        Refactored from generate_heatmap_figure in your friend's code.
-        Returns a Base64 string of the final image.
+        Splits (x, y, weight) gaze points into pixel columns, rows and weights.
+        Points outside the display (or on its top/left edge) are dropped.
         """
+        points = np.asarray(gazepoints, dtype=np.float64).reshape(-1, 3)
+        xs = points[:, 0].astype(np.int64)
+        ys = points[:, 1].astype(np.int64)
+        inside = (xs > 0) & (xs < width) & (ys > 0) & (ys < height)
+        return xs[inside], ys[inside], points[inside, 2]
+
+    def bin_points(self, gazepoints, dispsize):
+        """Accumulates (x, y, weight) gaze points into a weighted count grid in one pass."""
         width, height = dispsize
+        xs, ys, weights = self._points_inside(gazepoints, width, height)
+        if xs.size == 0:
+            return np.zeros((height, width), dtype=np.float32)
+
+        counts = np.bincount(ys * width + xs, weights=weights, minlength=width * height)
+        return counts.reshape(height, width).astype(np.float32)
+
+    def add_points(self, grid, gazepoints):
+        """
+        Adds gaze points to an existing count grid in place.
+        Unlike bin_points this costs O(points), which suits small incremental batches.
+        """
+        height, width = grid.shape
+        xs, ys, weights = self._points_inside(gazepoints, width, height)
+        np.add.at(grid, (ys, xs), weights.astype(grid.dtype))
+        return grid
+
+    def smooth_density(self, grid, sigma=None):
+        """Spreads a count grid with the gaussian kernel using a single convolution."""
+        kernel, anchor = self._get_conv_kernel(self.sigma if sigma is None else sigma)
+        return cv2.sepFilter2D(
+            grid,
+            cv2.CV_32F,
+            kernel,
+            kernel,
+            anchor=(anchor, anchor),
+            borderType=cv2.BORDER_CONSTANT
+        )
+
+    def accumulate(self, gazepoints, dispsize, sigma=None):
+        """Returns the smoothed density map for the gaze points, shaped (height, width)."""
+        return self.smooth_density(self.bin_points(gazepoints, dispsize), sigma)
+
+    def render(self, heatmap, background_img=None, alpha=0.8, threshold=None, colormap='turbo'):
+        """
+        Composites the density map over the background image.
+        Values below threshold (default THRESHOLD) * mean of the non-zero density are left transparent.
+        Returns a BGRA uint8 array shaped like the heatmap.
+        """
+        if colormap not in self.COLORMAPS:
+            raise ValueError(f"Unknown colormap '{colormap}'")
+        threshold = self.THRESHOLD if threshold is None else threshold
+        height, width = heatmap.shape
 
         if background_img is not None:
-            screen = np.array(background_img).astype('float32') / 255.0
-            if screen.shape[2] == 4: screen = screen[:, :, :3]
+            background = np.asarray(background_img)
+            if background.ndim == 2:
+                background = cv2.cvtColor(background, cv2.COLOR_GRAY2BGR)
+            elif background.shape[2] == 4:
+                background = background[:, :, :3]
+            if background.shape[:2] != (height, width):
+                background = cv2.resize(background, (width, height), interpolation=cv2.INTER_AREA)
+            background = background.astype(np.float32) / 255.0
+            background_alpha = self.BACKGROUND_ALPHA
         else:
-            screen = np.zeros((height, width, 3), dtype='float32')
+            background = np.zeros((height, width, 3), dtype=np.float32)
+            background_alpha = 0.0
 
-        strt = int(self.gaussian_wh / 2)
-        heatmap_padded = np.zeros((height + 2 * strt, width + 2 * strt), dtype=float)
+        heat_alpha = np.zeros((height, width, 1), dtype=np.float32)
+        heat_color = np.zeros((height, width, 3), dtype=np.float32)
 
+        positive = heatmap > 0
+        if np.any(positive):
+            lowbound = np.mean(heatmap[positive]) * threshold
+            visible = heatmap >= lowbound
+            vmin, vmax = heatmap[visible].min(), heatmap[visible].max()
+            scale = 256.0 / (vmax - vmin) if vmax > vmin else 0.0
 
-        for p in gazepoints:
-            x_pos = strt + int(p[0]) - strt
-            y_pos = strt + int(p[1]) - strt
-            
-            if (0 < x_pos < width) and (0 < y_pos < height):
-                heatmap_padded[y_pos:y_pos + self.gaussian_wh, x_pos:x_pos + self.gaussian_wh] += self.kernel * p[2]
+            index = np.clip((heatmap - vmin) * scale, 0, 255).astype(np.uint8)
+            heat_color = self.luts[colormap][index]
+            heat_alpha[visible] = alpha
 
-        heatmap = heatmap_padded[strt:height + strt, strt:width + strt]
+        # Porter-Duff "over": heat layer on top of the (semi transparent) background
+        out_alpha = heat_alpha + background_alpha * (1.0 - heat_alpha)
+        out_color = heat_color * heat_alpha + background * (background_alpha * (1.0 - heat_alpha))
+        np.divide(out_color, out_alpha, out=out_color, where=out_alpha > 0)
 
-        fig = plt.figure(figsize=(width/100, height/100), dpi=100, frameon=False)
-        ax = plt.Axes(fig, [0, 0, 1, 1])
-        ax.set_axis_off()
-        fig.add_axes(ax)
-        
-        if background_img is not None:
-            ax.imshow(background_img, alpha=0.8)
-        
-        if np.any(heatmap > 0):
-            lowbound = np.mean(heatmap[heatmap > 0]) * 0.5
-            heatmap_masked = np.ma.masked_where(heatmap < lowbound, heatmap)
-            
-            ax.imshow(heatmap_masked, cmap='turbo', alpha=0.8, interpolation='gaussian')
-        
-        ax.set_xlim(0, width)
-        ax.set_ylim(height, 0)
+        composite = np.empty((height, width, 4), dtype=np.uint8)
+        composite[:, :, :3] = np.clip(out_color * 255.0 + 0.5, 0, 255)
+        composite[:, :, 3] = np.clip(out_alpha[:, :, 0] * 255.0 + 0.5, 0, 255)
+        return composite
+
+    def encode_png(self, image) -> memoryview:
+        """Encodes to PNG and exposes the encoder's buffer without copying it."""
+        ok, buf = cv2.imencode('.png', image)
+        if not ok:
+            raise ValueError("Failed to encode heatmap as PNG")
+        return memoryview(buf).cast('B')
+
+    def create_heatmap(self, gazepoints, dispsize, background_img=None, alpha=0.8,
+                       threshold=None, colormap='turbo', sigma=None, out_width=None):
+        """Returns compose_heatmap's image encoded as PNG bytes."""
+        return self.encode_png(self.compose_heatmap(gazepoints, dispsize, background_img, alpha,
+                                                    threshold, colormap, sigma, out_width))
+
+    def compose_heatmap(self, gazepoints, dispsize, background_img=None, alpha=0.8,
+                        threshold=None, colormap='turbo', sigma=None, out_width=None):
+        """
+        Renders the gaze points over the background image.
+        With out_width the points, kernel and background are scaled down first,
+        so smaller previews are also cheaper to compute.
+        Returns the BGRA image (see render).
+        """
+        width, height = dispsize
+        sigma = self.sigma if sigma is None else sigma
+
+        if out_width is not None and 0 < out_width < width:
+            scale = out_width / width
+            points = np.array(gazepoints, dtype=np.float64).reshape(-1, 3)
+            points[:, :2] *= scale
+            gazepoints = points
+            dispsize = (out_width, max(1, int(round(height * scale))))
+            sigma *= scale
+
+        heatmap = self.accumulate(gazepoints, dispsize, sigma)
+        return self.render(heatmap, background_img, alpha, threshold, colormap)
+
+    def create_heatmap_from_grid(self, grid, background_img=None, alpha=0.8,
+                                 threshold=None, colormap='turbo', sigma=None, out_width=None):
+        """Returns compose_heatmap_from_grid's image encoded as PNG bytes."""
+        return self.encode_png(self.compose_heatmap_from_grid(grid, background_img, alpha,
+                                                              threshold, colormap, sigma, out_width))
+
+    def compose_heatmap_from_grid(self, grid, background_img=None, alpha=0.8,
+                                  threshold=None, colormap='turbo', sigma=None, out_width=None):
+        """
+        Renders an already binned count grid (see bin_points), e.g. a per-model aggregate.
+        Returns the BGRA image (see render).
+        """
+        height, width = grid.shape
+        sigma = self.sigma if sigma is None else sigma
+
+        if out_width is not None and 0 < out_width < width:
+            scale = out_width / width
+            # Only relative density matters for rendering, so an area average is enough
+            grid = cv2.resize(np.asarray(grid, dtype=np.float32), (out_width, max(1, int(round(height * scale)))),
+                              interpolation=cv2.INTER_AREA)
+            sigma *= scale
 
-        buf = BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, transparent=True)
-        plt.close(fig)
-        return base64.b64encode(buf.getvalue()).decode('utf-8')
+        heatmap = self.smooth_density(np.asarray(grid, dtype=np.float32), sigma)
+        return self.render(heatmap, background_img, alpha, threshold, colormap)
 
 heatmap_service = HeatmapService()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+from config import Config
+
+class JobQueueFull(Exception):
+    """Raised when the render queue already holds max_pending jobs."""
+
+class JobService:
+    """
+    Runs CPU-heavy render jobs on a process pool so they neither hold a
+    request thread nor contend for the API process' GIL.
+    The number of queued + running jobs is bounded to apply backpressure.
+    Completion callbacks run on a small thread pool of their own: future callbacks
+    would otherwise run on the executor's result thread, which cannot collect other
+    workers' results meanwhile and must not submit new jobs itself.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, callback_workers: int = 2):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="render-results")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking the multi-threaded server process is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, fn: Callable, *args, on_done: Callable[[Future], None]) -> Future:
+        """
+        Schedules fn(*args) on a worker process and calls on_done(future) once it finishes.
+        Raises JobQueueFull when the queue is at capacity.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull()
+            self._pending += 1
+            try:
+                try:
+                    future = self._get_executor().submit(fn, *args)
+                except BrokenProcessPool:
+                    Config.log("Render worker pool was broken, restarting it", "JOBPOOLERROR")
+                    self._executor = None
+                    future = self._get_executor().submit(fn, *args)
+            except BaseException:
+                self._pending -= 1
+                raise
+
+        def _callback(f: Future):
+            try:
+                on_done(f)
+            except Exception as e:
+                Config.log(f"Render job callback failed: {e}", "JOBCALLBACKERROR")
+
+        def _done(f: Future):
+            with self._lock:
+                self._pending -= 1
+            try:
+                self._callbacks.submit(_callback, f)
+            except RuntimeError:
+                # Callback pool already shut down: nothing else needs the result thread any more
+                _callback(f)
+
+        future.add_done_callback(_done)
+        return future
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        self._callbacks.shutdown(wait=False)
+
+render_jobs = JobService(Config.RENDER_WORKERS, Config.RENDER_QUEUE_DEPTH)
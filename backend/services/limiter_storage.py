@@ -0,0 +1,138 @@
+"""
+Rate limit counters shared by every worker process through a local SQLite (WAL) file.
+Importing this module registers the "sqlite" scheme with limits, so the limiter can be
+pointed at it with a storage URI such as sqlite:///data/ratelimit.db (SQLAlchemy style:
+three slashes for a relative path, four for an absolute one).
+"""
+import sqlite3 as sql
+import threading
+import time
+from math import floor
+from pathlib import Path
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    limits storage backed by a single table of (key, count, expires_at) rows.
+    A sliding window acquisition reads both windows and increments the current one inside
+    one BEGIN IMMEDIATE transaction, so concurrent workers can never overshoot the limit.
+    """
+    STORAGE_SCHEME = ["sqlite"]
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, busy_timeout_ms: int = 5000, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = Path(uri.removeprefix("sqlite:///"))
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        self._writes = 0
+        # The file and table are created by the first connection, not when the limiter is
+        # built at import time
+        self._schema_ready = False
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return sql.Error
+
+    def _connection(self) -> sql.Connection:
+        con = getattr(self._local, "connection", None)
+        if con is None:
+            if not self._schema_ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; multi-statement updates open their own transaction
+            con = sql.connect(self.path, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode = WAL;")
+            # Counters are disposable, losing the last ones on power loss is acceptable
+            con.execute("PRAGMA synchronous = OFF;")
+            con.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms};")
+            if not self._schema_ready:
+                con.execute("""
+                    CREATE TABLE IF NOT EXISTS RateLimits (
+                        key TEXT PRIMARY KEY,
+                        count INTEGER NOT NULL,
+                        expires_at REAL NOT NULL
+                    ) WITHOUT ROWID
+                """)
+                con.execute("CREATE INDEX IF NOT EXISTS idx_ratelimits_expires ON RateLimits (expires_at)")
+                self._schema_ready = True
+            self._local.connection = con
+        return con
+
+    def _incr(self, con: sql.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        row = con.execute("""
+            INSERT INTO RateLimits (key, count, expires_at) VALUES (?1, ?2, ?3)
+            ON CONFLICT (key) DO UPDATE SET
+                count = CASE WHEN expires_at <= ?4 THEN excluded.count ELSE count + excluded.count END,
+                expires_at = CASE WHEN expires_at <= ?4 THEN excluded.expires_at ELSE expires_at END
+            RETURNING count
+        """, (key, amount, now + expiry, now)).fetchone()
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            con.execute("DELETE FROM RateLimits WHERE expires_at <= ?", (now,))
+        return row[0]
+
+    def _get(self, con: sql.Connection, key: str, now: float) -> int:
+        row = con.execute("SELECT count FROM RateLimits WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        return 0 if row is None else row[0]
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._incr(self._connection(), key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        return self._get(self._connection(), key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM RateLimits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return now if row is None else row[0]
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sql.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._connection().execute("DELETE FROM RateLimits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM RateLimits WHERE key = ?", (key,))
+
+    def _window(self, con: sql.Connection, key: str, expiry: int, now: float) -> tuple[int, float, int, float]:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(con, previous_key, now)
+        current_count = self._get(con, current_key, now)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        con = self._connection()
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            previous_count, previous_ttl, current_count, _ = self._window(con, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                con.execute("ROLLBACK")
+                return False
+            # A window's counter lives for two windows, as it is the previous one during the second
+            self._incr(con, self.sliding_window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            con.execute("COMMIT")
+            return True
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        return self._window(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Iterator
+from config import Config
+from logger import AsyncLogger, LEVELS
+
+class LogService:
+    """
+    Read side of the JSON-lines log: filtered tails that seek backward from the end of
+    the file (and into rotated files) instead of reading it whole, and a follow mode
+    that streams new records as they are flushed.
+    """
+    BLOCK_SIZE = 64 * 1024
+    # Workers flush independently, so records may be slightly out of order in the file
+    ORDER_SLACK = timedelta(seconds=5)
+    POLL_INTERVAL = 0.5
+    KEEPALIVE_INTERVAL = 15.0
+
+    def __init__(self, logger: AsyncLogger):
+        self.logger = logger
+
+    def files(self) -> list[Path]:
+        """The current log file followed by its rotated backups, newest first."""
+        path = self.logger.path
+        backups = [path.with_name(f"{path.name}.{index}") for index in range(1, self.logger.backup_count + 1)]
+        return [p for p in [path, *backups] if p.exists()]
+
+    def matcher(self, codes: set[str] | None = None, min_level: int = 0,
+                since: datetime | None = None, until: datetime | None = None) -> Callable[[dict], bool]:
+        since, until = _as_utc(since), _as_utc(until)
+
+        def match(record: dict) -> bool:
+            if codes is not None and record.get("code") not in codes:
+                return False
+            if LEVELS.get(record.get("level"), 0) < min_level:
+                return False
+            if since is not None or until is not None:
+                ts = _record_time(record)
+                if ts is None or (since is not None and ts < since) or (until is not None and ts > until):
+                    return False
+            return True
+        return match
+
+    def _read_backward(self, path: Path) -> Iterator[bytes]:
+        """Yields the lines of a file from last to first, reading BLOCK_SIZE at a time."""
+        with open(path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0:
+                step = min(self.BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + remainder).split(b"\n")
+                remainder = lines[0]
+                for line in reversed(lines[1:]):
+                    if line:
+                        yield line
+            if remainder:
+                yield remainder
+
+    def tail(self, limit: int, match: Callable[[dict], bool], since: datetime | None = None) -> list[str]:
+        """Returns up to limit matching lines, oldest first."""
+        stop_before = _as_utc(since) - self.ORDER_SLACK if since is not None else None
+        lines: list[str] = []
+        for path in self.files():
+            for raw in self._read_backward(path):
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if stop_before is not None:
+                    ts = _record_time(record)
+                    if ts is not None and ts < stop_before:
+                        return lines[::-1]
+                if match(record):
+                    lines.append(raw.decode("utf-8", errors="replace"))
+                    if len(lines) >= limit:
+                        return lines[::-1]
+        return lines[::-1]
+
+    async def follow(self, match: Callable[[dict], bool]) -> AsyncIterator[str]:
+        """
+        Streams matching records written from now on as server-sent events.
+        Survives rotation by reopening the file once its inode changes. The file is opened,
+        read and stat'ed in a worker thread, never on the event loop.
+        """
+        follower = await asyncio.to_thread(_LogFollower, self.logger.path)
+        idle = 0.0
+        try:
+            while True:
+                lines = await asyncio.to_thread(follower.read_lines)
+                if lines is not None:
+                    idle = 0.0
+                    for raw in lines:
+                        try:
+                            record = json.loads(raw)
+                        except ValueError:
+                            continue
+                        if match(record):
+                            yield f"data: {raw.decode('utf-8', errors='replace')}\n\n"
+                    continue
+
+                await asyncio.sleep(self.POLL_INTERVAL)
+                idle += self.POLL_INTERVAL
+                if idle >= self.KEEPALIVE_INTERVAL:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+        finally:
+            follower.close()
+
+class _LogFollower:
+    """Blocking file side of LogService.follow; every call runs in a worker thread."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.handle: BinaryIO | None = None
+        self.pending = b""
+        # Only history present at connect time is skipped; a rotated-in file is read from the top
+        self.skip_existing = path.exists()
+        # A read still running in its thread when the stream is cancelled must not race close()
+        self._lock = threading.Lock()
+
+    def read_lines(self) -> list[bytes] | None:
+        """
+        Returns the complete lines flushed since the last call, [] right after a rotation
+        (so the caller reads the new file at once), or None when there is nothing new.
+        """
+        with self._lock:
+            if self.handle is None and self.path.exists():
+                self.handle = open(self.path, "rb")
+                if self.skip_existing:
+                    self.handle.seek(0, os.SEEK_END)
+                    self.skip_existing = False
+
+            chunk = self.handle.read() if self.handle is not None else b""
+            if chunk:
+                lines = (self.pending + chunk).split(b"\n")
+                self.pending = lines.pop()
+                return lines
+
+            if self.handle is not None and _rotated(self.path, self.handle):
+                self.handle.close()
+                self.handle = None
+                self.pending = b""
+                return []
+            return None
+
+    def close(self) -> None:
+        with self._lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+def _record_time(record: dict) -> datetime | None:
+    try:
+        return datetime.fromisoformat(record["ts"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _rotated(path: Path, handle) -> bool:
+    try:
+        return os.stat(path).st_ino != os.fstat(handle.fileno()).st_ino
+    except OSError:
+        return True
+
+log_service = LogService(Config.logger)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from config import Config
+from services.storage_service import atomic_writer
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+class ModelCacheService:
+    """
+    In-process LRU of decoded model (stimulus) images, keyed by model id and file mtime,
+    so the PNG decode stays off the per-upload hot path.
+    With use_sidecar, the decoded pixels are also written next to the PNG as a .npy file
+    that other workers can memory-map instead of decoding the PNG again.
+    """
+
+    def __init__(self, max_bytes: int, use_sidecar: bool = False):
+        self.max_bytes = max_bytes
+        self.use_sidecar = use_sidecar
+        self._entries: OrderedDict[int, tuple[float, np.ndarray]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _cost(self, image: np.ndarray) -> int:
+        # Memory-mapped sidecars live in the page cache, not in our budget
+        return 0 if isinstance(image, np.memmap) else image.nbytes
+
+    def _sidecar_path(self, model_path: Path) -> Path:
+        return model_path.with_suffix(model_path.suffix + '.npy')
+
+    def _decode(self, model_path: Path, mtime: float) -> np.ndarray | None:
+        sidecar = self._sidecar_path(model_path)
+        if self.use_sidecar and sidecar.exists() and sidecar.stat().st_mtime >= mtime:
+            return np.load(sidecar, mmap_mode='r')
+
+        image = cv2.imread(model_path, cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        image.setflags(write=False)
+
+        if self.use_sidecar:
+            try:
+                with atomic_writer(sidecar) as f:
+                    np.save(f, image, allow_pickle=False)
+            except OSError as e:
+                Config.log(f"Failed to write model sidecar {sidecar}: {e}", "FILEWRITEERROR")
+        return image
+
+    def get(self, model_id: int, model_path: str) -> np.ndarray | None:
+        """Returns the decoded BGR image (read-only), or None if it can't be read."""
+        path = Path(model_path)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            self.invalidate(model_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(model_id)
+                return entry[1]
+
+        image = self._decode(path, mtime)
+        if image is None:
+            return None
+
+        with self._lock:
+            old = self._entries.pop(model_id, None)
+            if old is not None:
+                self._size -= self._cost(old[1])
+            cost = self._cost(image)
+            if cost <= self.max_bytes:
+                self._entries[model_id] = (mtime, image)
+                self._size += cost
+                while self._size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= self._cost(evicted)
+        return image
+
+    def invalidate(self, model_id: int, model_path: str | None = None) -> None:
+        """Drops a model from the cache and removes its sidecar, if any."""
+        with self._lock:
+            entry = self._entries.pop(model_id, None)
+            if entry is not None:
+                self._size -= self._cost(entry[1])
+        if model_path:
+            self._sidecar_path(Path(model_path)).unlink(missing_ok=True)
+
+model_cache = ModelCacheService(Config.MODEL_CACHE_MAX_MB * 1024 * 1024, Config.MODEL_CACHE_SIDECAR)
@@ -0,0 +1,70 @@
+import hashlib
+import os
+from pathlib import Path
+from config import Config
+from services.storage_service import write_file_atomic
+
+class RenderCacheService:
+    """
+    Size-bounded LRU cache of rendered heatmaps on disk.
+    Entries are named "<prefix>_<param hash>.png", where the prefix is the session id
+    (or "model<id>" for aggregates), and their mtime is used as the recency marker,
+    so the cache is shared safely between workers.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def make_key(self, prefix: int | str, *params) -> str:
+        digest = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()
+        return f"{prefix}_{digest}"
+
+    def get(self, key: str) -> Path | None:
+        path = self.cache_dir / f"{key}.png"
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes | memoryview) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.png"
+        write_file_atomic(path, data)
+        self._evict()
+        return path
+
+    def invalidate(self, prefix: int | str) -> None:
+        for path in self.cache_dir.glob(f"{prefix}_*.png"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.png'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+render_cache = RenderCacheService(Config.RENDER_CACHE_PATH, Config.RENDER_CACHE_MAX_MB * 1024 * 1024)
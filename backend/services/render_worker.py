@@ -0,0 +1,28 @@
+"""
+Entry points executed inside the render worker processes.
+Kept free of FastAPI and database imports so workers start quickly.
+"""
+from services.gaze_service import gaze_service
+from services.heatpmap_service import heatmap_service
+from services.model_cache_service import model_cache
+from services.storage_service import save_heatmap_to_disk
+from services.thumbnail_service import thumbnail_service
+
+
+def render_session(samples_path: str, dispsize: tuple[int, int], model_id: int, model_path: str) -> tuple[str, dict]:
+    """
+    Renders a stored gaze session over its model image and saves the PNG.
+    Returns the heatmap file path to be stored in the database and its previews, downscaled
+    from the composite already in memory; encoding them is left until the job is reported done.
+    """
+    background = model_cache.get(model_id, model_path)
+    if background is None:
+        raise ValueError("Invalid image data")
+
+    composite = heatmap_service.compose_heatmap(
+        gazepoints=gaze_service.as_weighted_points(gaze_service.load(samples_path)),
+        dispsize=dispsize,
+        background_img=background
+    )
+    file_path = save_heatmap_to_disk(heatmap_service.encode_png(composite))
+    return file_path, thumbnail_service.scale(composite)
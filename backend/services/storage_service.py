@@ -0,0 +1,216 @@
+import glob
+import hashlib
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+from config import Config
+
+
+@contextmanager
+def atomic_writer(file_path: Path):
+    """
+    Yields a binary file object backed by a temp file in the target folder.
+    The temp file is renamed into place on success and removed on failure,
+    so readers never observe a partially written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """
+    Holds an exclusive advisory lock on lock_path, shared by threads and processes.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def write_file_atomic(file_path: Path, data: bytes | memoryview) -> None:
+    with atomic_writer(file_path) as f:
+        f.write(data)
+
+
+class BlobStore:
+    """
+    Content-addressed file store: blobs are named by their SHA-256 and sharded into
+    two directory levels (ab/cd/abcd....png), so identical uploads share one file and
+    no directory grows past a few hundred entries.
+    Each blob has a reference count in a ".refs" sidecar, changed under a lock on its
+    shard, so it is only unlinked once its last reference is released.
+    """
+
+    def __init__(self, root: Path, suffix: str = ".png"):
+        self.root = root
+        self.suffix = suffix
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{self.suffix}"
+
+    def _refs_path(self, path: Path) -> Path:
+        return path.with_name(path.name + ".refs")
+
+    def _lock_path(self, path: Path) -> Path:
+        return path.parent / ".lock"
+
+    def _read_refs(self, path: Path) -> int:
+        try:
+            return int(self._refs_path(path).read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_refs(self, path: Path, count: int) -> None:
+        write_file_atomic(self._refs_path(path), str(count).encode("ascii"))
+
+    def put(self, data: bytes | memoryview) -> str:
+        """
+        Stores the bytes (or reuses an identical blob) and takes a reference on it.
+        Returns the relative file path to be stored in the database.
+        """
+        path = self.path_for(hashlib.sha256(data).hexdigest())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self._lock_path(path)):
+            if not path.exists():
+                write_file_atomic(path, data)
+            self._write_refs(path, self._read_refs(path) + 1)
+        return str(path)
+
+    def stage(self, source: BinaryIO, chunk_size: int = 1024 * 1024) -> tuple[Path, str]:
+        """
+        Copies a file object into a temp file inside the store, hashing it on the way.
+        Returns (temp path, SHA-256) ready for put_file; the caller removes the temp file on failure.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        hasher = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while chunk := source.read(chunk_size):
+                    hasher.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return Path(tmp_path), hasher.hexdigest()
+
+    def put_file(self, source: Path, digest: str) -> str:
+        """
+        Moves an already written file into the store under its precomputed SHA-256, or drops
+        it when an identical blob exists, and takes a reference. The source should live on
+        the same filesystem so the move is an atomic rename.
+        """
+        path = self.path_for(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self._lock_path(path)):
+            if path.exists():
+                Path(source).unlink(missing_ok=True)
+            else:
+                os.replace(source, path)
+            self._write_refs(path, self._read_refs(path) + 1)
+        return str(path)
+
+    def release(self, file_path: str | Path) -> bool:
+        """
+        Drops one reference and unlinks the blob with its last one, along with the files
+        derived from it (<name>.*: the refs sidecar, previews, decode caches).
+        Files from before the store (no sidecar) count as a single reference.
+        Returns False when the file does not exist.
+        """
+        path = Path(file_path)
+        with file_lock(self._lock_path(path)):
+            if not path.exists():
+                return False
+            remaining = self._read_refs(path) - 1
+            if remaining > 0:
+                self._write_refs(path, remaining)
+            else:
+                path.unlink()
+                for derived in path.parent.glob(glob.escape(path.stem) + ".*"):
+                    derived.unlink(missing_ok=True)
+        return True
+
+
+def probe_image_size(f: BinaryIO) -> tuple[int, int] | None:
+    """
+    Reads (width, height) from a PNG, JPEG, GIF or WebP header without decoding any pixels.
+    Returns None for other formats or a malformed header. Leaves f at an arbitrary position.
+    """
+    f.seek(0)
+    head = f.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        chunk = head[12:16]
+        if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+            f.seek(26)
+            width, height = struct.unpack("<HH", f.read(4))
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L" and head[20:21] == b"\x2f":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+        return None
+    if head[:2] == b"\xff\xd8":
+        # Walk the marker segments up to the first start-of-frame, which carries the size
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            code = marker[1]
+            if code == 0xFF:
+                f.seek(-1, os.SEEK_CUR)
+                continue
+            if code in (0x01, *range(0xD0, 0xD8)):
+                continue
+            segment = f.read(2)
+            if len(segment) < 2:
+                return None
+            length = struct.unpack(">H", segment)[0]
+            if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                frame = f.read(5)
+                if len(frame) < 5:
+                    return None
+                height, width = struct.unpack(">HH", frame[1:5])
+                return width, height
+            f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+model_blobs = BlobStore(Config.MODEL_PATH)
+heatmap_blobs = BlobStore(Config.HEATMAP_PATH)
+
+
+def save_heatmap_to_disk(img_data: bytes | memoryview) -> str:
+    """
+    Saves encoded heatmap bytes to the heatmap blob store.
+    Returns the relative file path to be stored in the database.
+    """
+    return heatmap_blobs.put(img_data)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+from services.gaze_service import gaze_service
+from services.heatpmap_service import heatmap_service
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+
+class GazeStream:
+    """
+    Server side accumulator of one live recording session.
+    Every batch is folded into the count grid as it arrives, so finalizing the
+    session only needs the smoothing and compositing steps.
+    """
+
+    def __init__(self, dispsize: tuple[int, int], max_points: int):
+        width, height = dispsize
+        self.dispsize = dispsize
+        self.max_points = max_points
+        self.grid = np.zeros((height, width), dtype=np.float32)
+        self.point_count = 0
+        self._chunks: list[np.ndarray] = []
+
+    def add_samples(self, samples: np.ndarray) -> None:
+        """Adds a batch of packed samples (see GazeService.SAMPLE_DTYPE)."""
+        if self.point_count + len(samples) > self.max_points:
+            raise ValueError(f"Session exceeds the limit of {self.max_points} points")
+        heatmap_service.add_points(self.grid, gaze_service.as_weighted_points(samples))
+        self._chunks.append(samples)
+        self.point_count += len(samples)
+
+    def samples(self) -> np.ndarray:
+        if not self._chunks:
+            return np.empty(0, dtype=gaze_service.SAMPLE_DTYPE)
+        return np.concatenate(self._chunks)
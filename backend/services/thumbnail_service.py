@@ -0,0 +1,82 @@
+from __future__ import annotations
+from pathlib import Path
+from config import Config
+from services.storage_service import write_file_atomic
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+class ThumbnailService:
+    """
+    Downscaled WebP previews of stored images, written next to the original as
+    <name>.<size>.webp so list views don't have to pull and decode full PNGs.
+    Stored files are content-addressed, so a preview never goes stale and is
+    removed together with its original by the blob store.
+    """
+    SIZES = (256, 1024)
+    WEBP_QUALITY = 80
+
+    def path_for(self, file_path: str | Path, size: int) -> Path:
+        path = Path(file_path)
+        return path.with_name(f"{path.stem}.{size}.webp")
+
+    def scale(self, image: np.ndarray) -> dict[int, np.ndarray]:
+        """
+        Downscales an image to every preview size, ready for write().
+        Sizes larger than the image keep its resolution and only change the encoding.
+        """
+        height, width = image.shape[:2]
+        previews = {}
+        for size in self.SIZES:
+            scale = min(1.0, size / max(width, height))
+            previews[size] = image if scale == 1.0 else cv2.resize(
+                image,
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+        return previews
+
+    def write(self, file_path: str | Path, previews: dict[int, np.ndarray]) -> None:
+        """Encodes the scaled previews of file_path and writes them next to it."""
+        for size, preview in previews.items():
+            ok, buf = cv2.imencode('.webp', preview, [cv2.IMWRITE_WEBP_QUALITY, self.WEBP_QUALITY])
+            if not ok:
+                raise ValueError(f"Failed to encode {size}px preview of {file_path}")
+            write_file_atomic(self.path_for(file_path, size), memoryview(buf).cast('B'))
+
+    def generate(self, file_path: str | Path, image: np.ndarray | None = None) -> None:
+        """Writes every preview size of file_path, decoding it only when no image array is given."""
+        if image is None:
+            image = cv2.imread(str(file_path), cv2.IMREAD_UNCHANGED)
+            if image is None:
+                raise ValueError(f"Cannot decode {file_path}")
+        self.write(file_path, self.scale(image))
+
+    def generate_quietly(self, file_path: str | Path, image: np.ndarray | None = None) -> None:
+        """generate() for background tasks: failures are logged, the preview is backfilled on first request."""
+        try:
+            self.generate(file_path, image)
+        except Exception as e:
+            Config.log(f"Failed to generate previews of {file_path}: {e}", "THUMBNAILERROR")
+
+    def write_quietly(self, file_path: str | Path, previews: dict[int, np.ndarray]) -> None:
+        """write() for background work, logging failures like generate_quietly()."""
+        try:
+            self.write(file_path, previews)
+        except Exception as e:
+            Config.log(f"Failed to write previews of {file_path}: {e}", "THUMBNAILERROR")
+
+    def get(self, file_path: str | Path, size: int) -> Path:
+        """
+        Returns the preview path, generating the previews first for files stored before they existed.
+        Raises FileNotFoundError when the original is gone.
+        """
+        thumbnail = self.path_for(file_path, size)
+        if not thumbnail.exists():
+            if not Path(file_path).exists():
+                raise FileNotFoundError(file_path)
+            self.generate(file_path)
+        return thumbnail
+
+thumbnail_service = ThumbnailService()
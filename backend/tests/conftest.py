@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Tests import the backend modules the way uvicorn does, from the backend directory,
+# with every data path pointed at a scratch directory
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_data_dir = Path(tempfile.mkdtemp(prefix="heatmap-tests-"))
+os.environ.setdefault("JWT_TOKEN", "0" * 64)
+for name, sub in (
+    ("LOG_PATH", "logs"),
+    ("HEATMAP_PATH", "heatmap_storage"),
+    ("GAZE_PATH", "gaze_storage"),
+    ("AGGREGATE_PATH", "aggregates"),
+    ("RENDER_CACHE_PATH", "render_cache"),
+    ("MODEL_PATH", "models"),
+):
+    os.environ.setdefault(name, str(_data_dir / sub))
+os.environ.setdefault("DB_PATH", str(_data_dir / "database.db"))
+os.environ.setdefault("RATE_LIMIT_STORAGE_URI", f"sqlite:///{_data_dir / 'ratelimit.db'}")
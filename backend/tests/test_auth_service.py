@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import pytest
+from services.auth_service import HashingBusy, HashingPool
+
+
+def free_slots(pool: HashingPool) -> int:
+    taken = 0
+    while pool._slots.acquire(blocking=False):
+        taken += 1
+    for _ in range(taken):
+        pool._slots.release()
+    return taken
+
+
+def test_run_returns_result_and_frees_slot():
+    pool = HashingPool(workers=1, max_queue=2, queue_timeout=10)
+    assert asyncio.run(pool.run(lambda a, b: a + b, 2, 3)) == 5
+    metrics = pool.metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["completed"] == 1
+    assert free_slots(pool) == 3
+
+
+def test_run_rejects_when_full():
+    pool = HashingPool(workers=1, max_queue=0, queue_timeout=10)
+    release = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HashingBusy):
+            await pool.run(lambda: None)
+        release.set()
+        await blocker
+
+    asyncio.run(scenario())
+    assert pool.metrics()["rejected"] == 1
+    assert free_slots(pool) == 1
+
+
+def test_cancelled_queued_run_releases_its_slot():
+    pool = HashingPool(workers=1, max_queue=2, queue_timeout=10)
+    release = threading.Event()
+    ran = threading.Event()
+
+    async def scenario():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        # Queued behind the blocker, then abandoned like a request whose client disconnected
+        queued = asyncio.ensure_future(pool.run(ran.set))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await blocker
+
+    asyncio.run(scenario())
+    metrics = pool.metrics()
+    assert not ran.is_set()
+    assert metrics["in_flight"] == 0
+    assert metrics["cancelled"] == 1
+    assert metrics["completed"] == 1
+    assert free_slots(pool) == 3
+
+
+def test_cancelled_running_run_still_releases_its_slot():
+    pool = HashingPool(workers=1, max_queue=0, queue_timeout=10)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+
+    asyncio.run(scenario())
+    # The hash itself cannot be interrupted; its slot comes back once it finishes
+    release.set()
+    pool._executor.shutdown(wait=True)
+    metrics = pool.metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["completed"] == 1
+    assert free_slots(pool) == 1
@@ -0,0 +1,163 @@
+import sqlite3 as sql
+import pytest
+from config import Config
+from database import Database, encode_cursor, decode_cursor
+
+
+# Schema the original Database() constructor created, without a user_version
+BASELINE_SCHEMA = (
+    """
+    CREATE TABLE Users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL CHECK (email LIKE '%_@_%._%'),
+        password TEXT NOT NULL,
+        role INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE Heatmaps (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        img_name TEXT NOT NULL,
+        image_path TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        model_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES Users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE Models (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model_name TEXT NOT NULL,
+        model_path TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DB_PATH", str(tmp_path / "database.db"))
+    database = Database()
+    yield database
+    database.close()
+
+
+def create_baseline(path: str) -> None:
+    con = sql.connect(path)
+    for statement in BASELINE_SCHEMA:
+        con.execute(statement)
+    con.execute("INSERT INTO Users (email, password) VALUES ('a@b.co', 'x'), ('c@d.co', 'x')")
+    con.execute("INSERT INTO Models (model_name, model_path, user_id) VALUES ('m', 'm.png', 1)")
+    con.execute("INSERT INTO Heatmaps (img_name, image_path, user_id, model_id) VALUES ('s', 's.png', 1, 1)")
+    con.commit()
+    con.close()
+
+
+def user_version(db: Database) -> int:
+    return db.queryExecution("PRAGMA user_version").fetchone()[0]
+
+
+def test_migrate_upgrades_a_baseline_database_and_keeps_its_rows(db):
+    create_baseline(Config.DB_PATH)
+    db.migrate()
+
+    assert user_version(db) == len(Database._MIGRATIONS) == 4
+    assert db.getTableCounts() == {"Users": 2, "Models": 1, "Heatmaps": 1}
+    assert db.findUserById(2)["email"] == "c@d.co"
+    assert db.findHeatmap(1)["img_name"] == "s"
+    indexes = {row["name"] for row in db.queryExecution("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_users_email_nocase", "idx_heatmaps_user_img", "idx_aggregate_sessions_model",
+            "idx_heatmaps_created", "idx_models_created"} <= indexes
+    # Tables added by the migrations exist and are usable
+    assert db.addGazeSamples(1, "g.npy", 10, 100, 50) is not None
+    assert db.findGazeSamples(1)["point_count"] == 10
+
+
+def test_migrate_is_a_no_op_on_an_up_to_date_database(db):
+    db.migrate()
+    db.addImageModel("m", "m.png", 1)
+    version = db.getTableVersion("Models")
+
+    db.migrate()
+    assert user_version(db) == 4
+    assert db.getTableCounts()["Models"] == 1
+    assert db.getTableVersion("Models") == version
+
+
+def test_table_stats_triggers_follow_inserts_updates_and_deletes(db):
+    db.migrate()
+    assert db.getTableCounts() == {"Users": 0, "Models": 0, "Heatmaps": 0}
+    version = db.getTableVersion("Heatmaps")
+
+    first = db.addHeatmap("a", "a.png", 1, 1)
+    second = db.addHeatmap("b", "b.png", 1, 1)
+    assert db.getTableCounts()["Heatmaps"] == 2
+    assert db.getTableVersion("Heatmaps") == version + 2
+
+    db.queryExecution("UPDATE Heatmaps SET img_name = 'c' WHERE id = ?", (second,))
+    assert db.getTableCounts()["Heatmaps"] == 2
+    assert db.getTableVersion("Heatmaps") == version + 3
+
+    db.delHeatmap(first)
+    assert db.getTableCounts()["Heatmaps"] == 1
+    assert db.getTableVersion("Heatmaps") == version + 4
+    # Other tables are untouched
+    assert db.getTableCounts()["Models"] == 0
+
+
+def walk_pages(fetch, limit: int, sort: str) -> list[list[dict]]:
+    """Follows next_cursor the way a client does and returns every page."""
+    from admin import page_response
+    pages, after = [], None
+    while True:
+        page = page_response(fetch(limit + 1, after), limit, sort)
+        pages.append(page["items"])
+        if page["next_cursor"] is None:
+            return pages
+        after = decode_cursor(page["next_cursor"])
+
+
+@pytest.fixture
+def heatmaps(db):
+    db.migrate()
+    db.queryExecution("INSERT INTO Users (email, password) VALUES ('u@x.io', 'x')")
+    # Few distinct names, so most page boundaries fall inside a run of equal sort values
+    names = ["b", "a", "c", "a", "b", "a", "c", "b", "a", "a", "c"]
+    return db, [db.addHeatmap(name, f"{i}.png", 1, 1) for i, name in enumerate(names)]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 11, 20])
+def test_admin_pages_by_name_have_no_duplicates_or_gaps(heatmaps, limit, descending):
+    db, ids = heatmaps
+    pages = walk_pages(lambda n, after: db.pageHeatmaps(n, "name", descending, after), limit, "name")
+
+    items = [item for page in pages for item in page]
+    assert all(len(page) == limit for page in pages[:-1])
+    assert sorted(item["id"] for item in items) == sorted(ids)
+    expected = sorted(items, key=lambda item: (item["name"], item["id"]), reverse=descending)
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_admin_pages_keep_the_search_filter_across_pages(heatmaps, limit):
+    db, ids = heatmaps
+    pages = walk_pages(lambda n, after: db.pageHeatmaps(n, "id", False, after, "a"), limit, "id")
+    items = [item for page in pages for item in page]
+    assert [item["name"] for item in items] == ["a"] * 5
+    assert [item["id"] for item in items] == sorted(item["id"] for item in items)
+
+    # The owner's email matches every session
+    pages = walk_pages(lambda n, after: db.pageHeatmaps(n, "id", False, after, "x.io"), limit, "id")
+    assert [item["id"] for page in pages for item in page] == ids
+    assert walk_pages(lambda n, after: db.pageHeatmaps(n, "id", False, after, "zz"), limit, "id") == [[]]
+
+
+def test_page_cursor_round_trips_and_rejects_foreign_input():
+    assert decode_cursor(encode_cursor("2024-01-02 03:04:05", 7)) == ("2024-01-02 03:04:05", 7)
+    for cursor in ("", "not base64!", encode_cursor("a", 1)[:-4], "WzEsMiwzXQ==", "eyJhIjogMX0="):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
@@ -0,0 +1,115 @@
+import os
+import time
+from email.utils import formatdate
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from services.file_service import FileService
+
+CONTENT = bytes(range(256)) * 8
+
+
+def make_client(service: FileService, path) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return service.response(request, path, media_type="image/png")
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def stored(tmp_path):
+    path = tmp_path / "ab" / "cd" / "abcd.png"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def service(tmp_path):
+    return FileService("secret", 300, False, tmp_path, "/protected/")
+
+
+def test_full_response_carries_validators(service, stored):
+    response = make_client(service, stored).get("/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["ETag"].startswith('"') and len(response.headers["ETag"]) == 66
+    assert response.headers["Cache-Control"] == FileService.IMMUTABLE
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_conditional_requests_get_a_bodyless_304(service, stored):
+    client = make_client(service, stored)
+    etag = client.get("/file").headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get("/file", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    assert client.get("/file", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    modified = formatdate(stored.stat().st_mtime, usegmt=True)
+    assert client.get("/file", headers={"If-Modified-Since": modified}).status_code == 304
+    assert client.get("/file", headers={"If-Modified-Since": formatdate(0, usegmt=True)}).status_code == 200
+    assert client.get("/file", headers={"If-Modified-Since": "yesterday"}).status_code == 200
+    # If-None-Match takes precedence over If-Modified-Since
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": modified}
+    assert client.get("/file", headers=headers).status_code == 200
+
+
+def test_range_requests_get_partial_content(service, stored):
+    client = make_client(service, stored)
+    response = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    assert client.get("/file", headers={"Range": "bytes=-16"}).content == CONTENT[-16:]
+    assert client.get("/file", headers={"Range": f"bytes={len(CONTENT)}-"}).status_code == 416
+
+
+def test_rewritten_file_gets_a_new_etag(service, stored):
+    client = make_client(service, stored)
+    etag = client.get("/file").headers["ETag"]
+    mtime = stored.stat().st_mtime
+    stored.write_bytes(CONTENT[::-1])
+    # Digests are cached per (path, mtime, size); make sure the rewrite moves the mtime
+    os.utime(stored, (mtime + 5, mtime + 5))
+    response = client.get("/file", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_accel_redirect_hands_files_under_the_root_to_nginx(tmp_path, stored):
+    service = FileService("secret", 300, True, tmp_path, "/protected")
+    response = make_client(service, stored).get("/file")
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/protected/ab/cd/abcd.png"
+    assert response.content == b""
+
+    outside = FileService("secret", 300, True, tmp_path / "elsewhere", "/protected/")
+    response = make_client(outside, stored).get("/file")
+    assert "X-Accel-Redirect" not in response.headers
+    assert response.content == CONTENT
+
+
+def test_signed_urls_verify_only_for_their_own_file_and_window(service):
+    expires, signature = service.sign("heatmap", 5)
+    assert expires % 300 == 0 and expires > time.time()
+    assert service.verify("heatmap", 5, expires, signature)
+    # Signing again within the window gives the same URL, so browser caches keep hitting
+    assert service.sign("heatmap", 5) == (expires, signature)
+
+    assert not service.verify("heatmap", 6, expires, signature)
+    assert not service.verify("model", 5, expires, signature)
+    assert not service.verify("heatmap", 5, expires + 300, signature)
+    tampered = signature[:-1] + ("1" if signature[-1] == "0" else "0")
+    assert not service.verify("heatmap", 5, expires, tampered)
+    assert not FileService("other", 300, False, service.accel_root, "/").verify("heatmap", 5, expires, signature)
+
+    past = int(time.time()) - 1
+    assert not service.verify("heatmap", 5, past, service._signature("heatmap", 5, past))
@@ -0,0 +1,72 @@
+import numpy as np
+from services.heatpmap_service import HeatmapService
+
+
+def reference_density(gazepoints, dispsize, gaussian_wh=200):
+    """The original per-point loop: a kernel slice added at every point inside the display."""
+    width, height = dispsize
+    x, y = np.meshgrid(np.arange(0, gaussian_wh), np.arange(0, gaussian_wh))
+    sd = gaussian_wh / 6
+    centre = gaussian_wh / 2
+    kernel = np.exp(-1.0 * (((x - centre)**2 / (2 * sd**2)) + ((y - centre)**2 / (2 * sd**2))))
+
+    strt = int(gaussian_wh / 2)
+    padded = np.zeros((height + 2 * strt, width + 2 * strt), dtype=float)
+    for p in gazepoints:
+        x_pos = int(p[0])
+        y_pos = int(p[1])
+        if (0 < x_pos < width) and (0 < y_pos < height):
+            padded[y_pos:y_pos + gaussian_wh, x_pos:x_pos + gaussian_wh] += kernel * p[2]
+    return padded[strt:height + strt, strt:width + strt]
+
+
+def assert_same_density(actual, expected):
+    assert actual.shape == expected.shape
+    scale = max(float(np.abs(expected).max()), 1e-12)
+    assert float(np.abs(actual - expected).max()) / scale < 1e-5
+
+
+def test_accumulate_matches_per_point_loop_for_weighted_points():
+    rng = np.random.default_rng(1)
+    dispsize = (320, 240)
+    points = np.column_stack([
+        rng.uniform(1, dispsize[0], 300),
+        rng.uniform(1, dispsize[1], 300),
+        rng.uniform(0.1, 3.0, 300),
+    ])
+    # Repeated points must add up like separate ones
+    points = np.vstack([points, points[:20]])
+
+    actual = HeatmapService().accumulate(points, dispsize)
+    assert_same_density(actual, reference_density(points, dispsize))
+
+
+def test_accumulate_drops_points_outside_the_display_like_the_loop():
+    dispsize = (200, 150)
+    points = [
+        (50, 40, 1.0),
+        (199, 149, 2.0),   # last pixel, inside
+        (0, 70, 1.0),      # left edge, dropped by the loop
+        (80, 0, 1.0),      # top edge, dropped
+        (200, 70, 1.0),    # right of the display
+        (80, 150, 1.0),    # below the display
+        (-5, -5, 1.0),
+        (1e6, 20, 1.0),
+        (120.7, 60.2, 0.5),  # fractional coordinates truncate
+    ]
+
+    actual = HeatmapService().accumulate(points, dispsize)
+    assert_same_density(actual, reference_density(points, dispsize))
+
+
+def test_accumulate_without_points_inside_is_empty():
+    actual = HeatmapService().accumulate([(0, 0, 1.0), (500, 10, 1.0)], (100, 80))
+    assert actual.shape == (80, 100)
+    assert not actual.any()
+
+
+def test_bin_points_keeps_the_weights():
+    grid = HeatmapService().bin_points([(10, 10, 2.0), (10, 10, 0.5), (20, 5, 1.0), (0, 5, 9.0)], (40, 30))
+    assert grid[10, 10] == 2.5
+    assert grid[5, 20] == 1.0
+    assert grid.sum() == 3.5
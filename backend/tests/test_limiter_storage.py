@@ -0,0 +1,98 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from limits import parse
+from limits.strategies import SlidingWindowCounterRateLimiter
+from services import limiter_storage
+from services.limiter_storage import SQLiteStorage
+
+WINDOW = 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [6000.0]  # the start of a window
+    monkeypatch.setattr(limiter_storage, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'ratelimit.db'}"
+
+
+def acquire(storage: SQLiteStorage, times: int, limit: int = 10) -> list[bool]:
+    return [storage.acquire_sliding_window_entry("k", limit, WINDOW) for _ in range(times)]
+
+
+def test_uri_with_an_absolute_path(uri, tmp_path):
+    assert uri.startswith("sqlite:////")
+    assert SQLiteStorage(uri).path == tmp_path / "ratelimit.db"
+
+
+def test_previous_window_counts_by_its_remaining_overlap(uri, clock):
+    storage = SQLiteStorage(uri)
+    assert acquire(storage, 11) == [True] * 10 + [False]
+
+    # Halfway through the next window, half of the previous window's 10 hits still count
+    clock[0] += WINDOW + WINDOW / 2
+    assert acquire(storage, 6) == [True] * 5 + [False]
+    previous, previous_ttl, current, _ = storage.get_sliding_window("k", WINDOW)
+    assert (previous, previous_ttl, current) == (10, WINDOW / 2, 5)
+
+    # Near the end of the window after, the 5 hits barely count any more
+    clock[0] += WINDOW + WINDOW / 2 - 6
+    assert acquire(storage, 10) == [True] * 10
+
+    # Two windows later nothing is left
+    clock[0] += 2 * WINDOW
+    assert storage.get_sliding_window("k", WINDOW)[::2] == (0, 0)
+    assert acquire(storage, 10) == [True] * 10
+
+
+def test_workers_share_one_window(uri, clock):
+    # Each worker process builds its own storage on the same file
+    workers = [SQLiteStorage(uri), SQLiteStorage(uri)]
+    results = [workers[i % 2].acquire_sliding_window_entry("k", 10, WINDOW) for i in range(12)]
+    assert results == [True] * 10 + [False] * 2
+
+    workers[1].clear_sliding_window("k", WINDOW)
+    assert workers[0].acquire_sliding_window_entry("k", 10, WINDOW)
+
+
+def test_concurrent_acquisitions_never_overshoot_the_limit(uri):
+    storage = SQLiteStorage(uri)
+    granted = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(20):
+            ok = storage.acquire_sliding_window_entry("k", 25, 3600)
+            with lock:
+                granted.append(ok)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert granted.count(True) == 25
+
+
+def test_fixed_window_counters_expire(uri, clock):
+    storage = SQLiteStorage(uri)
+    assert [storage.incr("k", WINDOW) for _ in range(3)] == [1, 2, 3]
+    assert storage.get("k") == 3
+    assert storage.get_expiry("k") == clock[0] + WINDOW
+
+    clock[0] += WINDOW
+    assert storage.get("k") == 0
+    assert storage.incr("k", WINDOW) == 1
+
+
+def test_limits_strategy_runs_on_the_storage(uri):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    item = parse("3/minute")
+    assert [limiter.hit(item, "ip", "/api/login") for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(item, "other-ip", "/api/login")
+    assert limiter.get_window_stats(item, "ip", "/api/login").remaining == 0
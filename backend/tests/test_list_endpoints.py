@@ -0,0 +1,71 @@
+import itertools
+import pytest
+from fastapi.testclient import TestClient
+from database import Database
+from services.auth_service import token_payload
+import main
+
+_user_ids = itertools.count(1000)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def migrated():
+    Database().migrate()
+
+
+@pytest.fixture
+def client():
+    # A fresh account per test, so each one sees only its own sessions
+    user_id = next(_user_ids)
+    main.app.dependency_overrides[token_payload] = lambda: {"id": user_id, "role": 1}
+    yield TestClient(main.app), user_id
+    main.app.dependency_overrides.clear()
+
+
+def get_sessions(client: TestClient, user_id: int, **params):
+    return client.get(f"/api/heatmap/get_by_user/{user_id}", params=params)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 8])
+def test_session_pages_have_no_duplicates_or_gaps(client, limit):
+    client, user_id = client
+    ids = [main.db.addHeatmap(f"s{i}", f"{i}.png", 1, user_id) for i in range(7)]
+
+    seen, after = [], None
+    while True:
+        response = get_sessions(client, user_id, limit=limit, **({"after": after} if after else {}))
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        seen += [item["id"] for item in page]
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            break
+        assert len(page) == limit
+    assert seen == ids
+
+
+def test_session_list_revalidates_against_its_etag(client):
+    client, user_id = client
+    main.db.addHeatmap("first", "first.png", 1, user_id)
+    response = get_sessions(client, user_id)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert [item["img_name"] for item in response.json()] == ["first"]
+
+    cached = client.get(f"/api/heatmap/get_by_user/{user_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    # Another page of the same list is a different representation
+    assert get_sessions(client, user_id, limit=1).headers["ETag"] != etag
+
+    main.db.addHeatmap("second", "second.png", 1, user_id)
+    changed = client.get(f"/api/heatmap/get_by_user/{user_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+def test_session_list_rejects_a_malformed_cursor(client):
+    client, user_id = client
+    assert get_sessions(client, user_id, limit=2, after="not-a-cursor").status_code == 400
@@ -0,0 +1,67 @@
+import hashlib
+import io
+from pathlib import Path
+import pytest
+from services.storage_service import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(tmp_path / "blobs")
+
+
+def refs(path: Path) -> int:
+    return int(path.with_name(path.name + ".refs").read_text())
+
+
+def test_identical_content_shares_one_sharded_blob(store):
+    first = Path(store.put(b"image"))
+    second = Path(store.put(b"image"))
+    other = Path(store.put(b"other"))
+
+    digest = hashlib.sha256(b"image").hexdigest()
+    assert first == second == store.root / digest[:2] / digest[2:4] / f"{digest}.png"
+    assert first.read_bytes() == b"image"
+    assert refs(first) == 2
+    assert other != first and refs(other) == 1
+
+
+def test_staged_upload_joins_an_existing_blob(store):
+    path = Path(store.put(b"image"))
+    tmp_path, digest = store.stage(io.BytesIO(b"image"), chunk_size=2)
+
+    assert digest == hashlib.sha256(b"image").hexdigest()
+    assert Path(store.put_file(tmp_path, digest)) == path
+    assert not tmp_path.exists()
+    assert refs(path) == 2
+    assert list(store.root.glob("*.tmp")) == []
+
+
+def test_last_release_removes_the_blob_and_its_derived_files(store):
+    path = Path(store.put(b"image"))
+    store.put(b"image")
+    # Previews and decode caches are written next to the blob as <name>.*
+    derived = [path.with_name(f"{path.stem}.256.webp"), path.with_name(f"{path.name}.npy")]
+    for file in derived:
+        file.write_bytes(b"derived")
+    neighbour = Path(store.put(b"neighbour"))
+
+    assert store.release(path)
+    assert path.exists() and refs(path) == 1
+    assert all(file.exists() for file in derived)
+
+    assert store.release(path)
+    assert not path.exists()
+    assert not path.with_name(path.name + ".refs").exists()
+    assert not any(file.exists() for file in derived)
+    assert neighbour.exists() and refs(neighbour) == 1
+
+    assert store.release(path) is False
+
+
+def test_file_without_a_sidecar_counts_as_one_reference(store):
+    legacy = store.root / "legacy.png"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"old upload")
+    assert store.release(legacy)
+    assert not legacy.exists()
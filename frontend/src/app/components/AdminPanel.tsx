@@ -15,6 +15,7 @@ export function AdminPanel() {
     const [isShowAddUserModal, setIsShowAddUserModal] = useState(false);
     const [modelName, setModelName] = useState("");
     const [uploadedImage, setUploadedImage] = useState<string | null>(null);
+    const [uploadedFile, setUploadedFile] = useState<File | null>(null);
     const [viewHeatmapSessionId, setViewHeatmapSessionId] = useState<number | null>(null);
     const [viewModelId, setViewModelId] = useState<number | null>(null);
     const logContainerRef = useRef<HTMLDivElement>(null);
@@ -41,6 +42,25 @@ export function AdminPanel() {
         }
     };
 
+    const loadMore = async (kind: 'users' | 'heatmaps' | 'models') => {
+        const cursor = data?.next?.[kind];
+        if (!cursor) return;
+        try {
+            const response = await fetch(`${API_URL}/admin/${kind}?after=${encodeURIComponent(cursor)}`, {
+                headers: { 'Authorization': `Bearer ${localStorage.getItem('access_token')}` }
+            });
+            if (!response.ok) throw new Error();
+            const page = await response.json();
+            setData((prev: any) => ({
+                ...prev,
+                [kind]: [...prev[kind], ...page.items],
+                next: { ...prev.next, [kind]: page.next_cursor }
+            }));
+        } catch (err) {
+            toast.error("Failed to load more rows.");
+        }
+    };
+
     const checkSession = async (img_name:string) => {
         try {
           const response = await fetch(`${API_URL}/model/check/${img_name}`, {
@@ -100,21 +120,19 @@ export function AdminPanel() {
     };
 
     const savedImage = async () => {
-        if (!uploadedImage) return toast.error("No image uploaded.");
+        if (!uploadedFile) return toast.error("No image uploaded.");
 
-        const payload = {
-            model_name: modelName,
-            base64_image: uploadedImage
-        }
+        const payload = new FormData();
+        payload.append('model_name', modelName);
+        payload.append('file', uploadedFile);
 
         toast.promise(
-            fetch(`${API_URL}/model/upload`, {
+            fetch(`${API_URL}/model/upload/file`, {
                 method: 'POST',
                 headers: { 
-                'Content-Type': 'application/json',
                 'Authorization': `Bearer ${localStorage.getItem('access_token')}`
                 },
-                body: JSON.stringify(payload)
+                body: payload
             }),
             {
                 loading: 'Saving image model...',
@@ -181,6 +199,36 @@ export function AdminPanel() {
 
     useEffect(() => { fetchAdminData(); }, []);
 
+    // Follow new log records over server-sent events while the logs tab is open
+    useEffect(() => {
+        if (activeTab !== 'logs') return;
+        const controller = new AbortController();
+        const followLogs = async () => {
+            const response = await fetch(`${API_URL}/admin/logs/stream`, {
+                headers: { 'Authorization': `Bearer ${localStorage.getItem('access_token')}` },
+                signal: controller.signal
+            });
+            if (!response.ok || !response.body) return;
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split("\n\n");
+                buffer = events.pop() ?? "";
+                const lines = events
+                    .filter(event => event.startsWith("data: "))
+                    .map(event => event.slice(6));
+                if (lines.length > 0)
+                    setLogs(prev => (prev + lines.join("\n") + "\n").split("\n").slice(-1000).join("\n"));
+            }
+        };
+        followLogs().catch(() => {});
+        return () => controller.abort();
+    }, [activeTab]);
+
     return (
         <>
             {isShowViewHeatmap && (
@@ -319,6 +367,9 @@ export function AdminPanel() {
                                 ))}
                                 </tbody>
                             </table>
+                            {data?.next?.users && (
+                                <Button variant="ghost" onClick={() => loadMore('users')} className="w-full text-cyan-400">Load more</Button>
+                            )}
                         </Card>
                     
                         <div className="flex space-x-2 p-1.5 rounded-2xl w-fit">
@@ -369,6 +420,7 @@ export function AdminPanel() {
                                             return;
                                             }
                     
+                                            setUploadedFile(file);
                                             const reader = new FileReader();
                                             reader.onload = () => setUploadedImage(reader.result as string);
                                             reader.readAsDataURL(file);
@@ -401,7 +453,7 @@ export function AdminPanel() {
                                                 <Button onClick={handleUploadModel} size="lg" className="w-full h-14 bg-cyan-500 hover:bg-cyan-600 text-white text-lg font-bold rounded-xl">
                                                     <Upload className="w-5 h-5 mr-2" /> Upload Model
                                                 </Button>
-                                                <Button onClick={() => setUploadedImage(null)} variant="ghost" className="w-full h-14 bg-red-500 text-white text-lg font-bold rounded-xl hover:bg-red-800/40">
+                                                <Button onClick={() => { setUploadedImage(null); setUploadedFile(null); }} variant="ghost" className="w-full h-14 bg-red-500 text-white text-lg font-bold rounded-xl hover:bg-red-800/40">
                                                     <Trash2 className="w-4 h-4 mr-2" />Reset Image
                                                 </Button>
                                             </div>
@@ -427,7 +479,7 @@ export function AdminPanel() {
                                         <tr key={h.id} className="hover:bg-white/[0.02]">
                                         <td className="px-6 py-4 flex items-center space-x-4">
                                             <div className="w-12 h-8 bg-black rounded border border-white/10 overflow-hidden">
-                                            <SecureImageModel modelId={h.id} className="w-full h-full object-cover" />
+                                            <SecureImageModel modelId={h.id} size={256} className="w-full h-full object-cover" />
                                             </div>
                                             <span className="text-white">{h.model_name}</span>
                                         </td>
@@ -444,6 +496,9 @@ export function AdminPanel() {
                                     ))}
                                     </tbody>
                                 </table>
+                                {data?.next?.models && (
+                                    <Button variant="ghost" onClick={() => loadMore('models')} className="w-full text-cyan-400">Load more</Button>
+                                )}
                             </Card>
                         </div>
                     </div>
@@ -464,7 +519,7 @@ export function AdminPanel() {
                                 <tr key={h.id} className="hover:bg-white/[0.02]">
                                 <td className="px-6 py-4 flex items-center space-x-4">
                                     <div className="w-12 h-8 bg-black rounded border border-white/10 overflow-hidden">
-                                        <SecureHeatmap sessionId={h.id} className="w-full h-full object-cover" />
+                                        <SecureHeatmap sessionId={h.id} size={256} className="w-full h-full object-cover" />
                                     </div>
                                     <span className="text-white">{h.name}</span>
                                 </td>
@@ -481,6 +536,9 @@ export function AdminPanel() {
                             ))}
                             </tbody>
                         </table>
+                        {data?.next?.heatmaps && (
+                            <Button variant="ghost" onClick={() => loadMore('heatmaps')} className="w-full text-cyan-400">Load more</Button>
+                        )}
                     </Card>
 
                 )}
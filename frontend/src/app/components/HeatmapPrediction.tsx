@@ -16,6 +16,17 @@ interface HeatmapSession {
   created_at: string;
 }
 
+// Little-endian (int16 x, int16 y, float32 weight) records, see /api/heatmap/upload/binary
+const packGazePoints = (points: { x: number, y: number }[]) => {
+  const view = new DataView(new ArrayBuffer(points.length * 8));
+  points.forEach((point, i) => {
+    view.setInt16(i * 8, point.x, true);
+    view.setInt16(i * 8 + 2, point.y, true);
+    view.setFloat32(i * 8 + 4, 1, true);
+  });
+  return view.buffer;
+};
+
 export function HeatmapPrediction() {
   const { isCalibrated, user } = useAuth();
   const [sessionName, setSessionName] = useState("");
@@ -36,6 +47,8 @@ export function HeatmapPrediction() {
   const viewModalRef = useRef<HTMLDivElement>(null);
 
   const gazeHistory = useRef<{ x: number, y: number }[]>([]);
+  const streamSocket = useRef<WebSocket | null>(null);
+  const streamedCount = useRef(0);
   const imageRef = useRef<HTMLImageElement>(null);
 
   const [sessions, setSessions] = useState<HeatmapSession[]>([]);
@@ -184,7 +197,10 @@ export function HeatmapPrediction() {
     wg.resume();
     wg.showPredictionPoints(true);
 
+    openStream();
+
     const recordInterval = setInterval(() => {
+      flushStream();
       setCountdown((prev) => {
         if (prev <= 1) {
           clearInterval(recordInterval);
@@ -196,6 +212,67 @@ export function HeatmapPrediction() {
     }, 1000);
   };
 
+  // Gaze points are streamed to the server while recording, so saving is almost instant
+  const openStream = () => {
+    if (!imageRef.current) return;
+    const { naturalWidth, naturalHeight } = imageRef.current;
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${protocol}://${window.location.host}${API_URL}/heatmap/stream`);
+
+    streamedCount.current = 0;
+    socket.onopen = () => {
+      socket.send(JSON.stringify({
+        token: localStorage.getItem('access_token'),
+        name: sessionName,
+        user_id: user?.id,
+        model_id: selectImageId,
+        width: naturalWidth,
+        height: naturalHeight
+      }));
+    };
+    streamSocket.current = socket;
+  };
+
+  const flushStream = () => {
+    const socket = streamSocket.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+
+    const batch = gazeHistory.current.slice(streamedCount.current);
+    if (batch.length === 0) return;
+    socket.send(packGazePoints(batch));
+    streamedCount.current += batch.length;
+  };
+
+  const finishStream = (socket: WebSocket) => new Promise((resolve, reject) => {
+    socket.onmessage = (event) => {
+      const result = JSON.parse(event.data);
+      if (result.status === 'success') resolve(result);
+      else reject(new Error(result.detail ?? 'Streaming failed'));
+    };
+    socket.onclose = () => reject(new Error('Stream closed before the session was saved'));
+    socket.send(JSON.stringify({ type: 'end' }));
+  });
+
+  // The server renders in the background; poll the job until the session exists
+  const waitForRenderJob = async (response: Response) => {
+    if (!response.ok) throw new Error('Upload failed');
+    const { job_id } = await response.json();
+
+    for (let attempt = 0; attempt < 120; attempt++) {
+      const jobResponse = await fetch(`${API_URL}/heatmap/job/${job_id}`, {
+        headers: { 
+          'Authorization': `Bearer ${localStorage.getItem('access_token')}` 
+        }
+      });
+      if (!jobResponse.ok) throw new Error('Could not check render job');
+      const job = await jobResponse.json();
+      if (job.status === 'done') return job;
+      if (job.status === 'failed') throw new Error(job.detail ?? 'Render failed');
+      await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+    throw new Error('Render job timed out');
+  };
+
   const finishAndSave = async () => {
     const wg = (window as any).webgazer;
     setIsRecording(false);
@@ -210,24 +287,34 @@ export function HeatmapPrediction() {
 
     const { naturalWidth, naturalHeight } = imageRef.current;
 
-    const payload = {
+    const sessionParams = new URLSearchParams({
       name: sessionName,
-      user_id: user?.id,
-      model_id: selectImageId,
-      width: naturalWidth,
-      height: naturalHeight,
-      points: gazeHistory.current
-    };
+      user_id: String(user?.id),
+      model_id: String(selectImageId),
+      width: String(naturalWidth),
+      height: String(naturalHeight)
+    });
+
+    flushStream();
+    const socket = streamSocket.current;
+    streamSocket.current = null;
+
+    // Fall back to a single upload when the stream could not be used; the server discards
+    // streams that drop before 'end', so the session is stored exactly once
+    const saving = socket && socket.readyState === WebSocket.OPEN
+      ? finishStream(socket)
+      : fetch(`${API_URL}/heatmap/upload/binary?${sessionParams}`, {
+          method: 'POST',
+          headers: { 
+            'Content-Type': 'application/octet-stream',
+            'Authorization': `Bearer ${localStorage.getItem('access_token')}`
+          },
+          body: packGazePoints(gazeHistory.current)
+        }).then(waitForRenderJob);
+    if (socket && socket.readyState !== WebSocket.OPEN) socket.close();
 
     toast.promise(
-      fetch(`${API_URL}/heatmap/upload`, {
-        method: 'POST',
-        headers: { 
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${localStorage.getItem('access_token')}`
-        },
-        body: JSON.stringify(payload)
-      }),
+      saving,
       {
         loading: 'Saving gaze data...',
         success: ()=>{
@@ -365,6 +452,7 @@ export function HeatmapPrediction() {
                   <>
                     <SecureImageModel
                       modelId={selectImageId!}
+                      size={1024}
                       className="w-full h-full object-cover opacity-50 grayscale"
                     ></SecureImageModel>
                     <div className="absolute inset-0 flex items-center justify-center">
@@ -461,6 +549,7 @@ export function HeatmapPrediction() {
                             <div className="w-12 h-8 bg-slate-800 rounded border border-white/10 overflow-hidden">
                               <SecureHeatmap 
                                   sessionId={session.id} 
+                                  size={256}
                                   className="w-full h-full object-cover opacity-80" 
                                 />
                             </div>
@@ -3,13 +3,19 @@ import { Skeleton } from '@/app/components/ui/skeleton';
 import { ImageIcon } from 'lucide-react';
 import { API_URL } from '@/app/App';
 
+// Longest side of a server-generated WebP preview; omit for the original image
+export type PreviewSize = 256 | 1024;
+
+const previewQuery = (size?: PreviewSize) => size ? `?size=${size}` : '';
+
 interface SecureImageProps {
   sessionId: number;
   className?: string;
   alt?: string;
+  size?: PreviewSize;
 }
 
-export const SecureHeatmap = forwardRef<HTMLImageElement, SecureImageProps>(({ sessionId, className, alt }, ref) => {
+export const SecureHeatmap = forwardRef<HTMLImageElement, SecureImageProps>(({ sessionId, className, alt, size }, ref) => {
   const [imgUrl, setImgUrl] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(false);
@@ -21,7 +27,7 @@ export const SecureHeatmap = forwardRef<HTMLImageElement, SecureImageProps>(({ s
       try {
         setLoading(true);
         const response = await fetch(
-          `${API_URL}/heatmaps/file/${sessionId}`,
+          `${API_URL}/heatmaps/file/${sessionId}${previewQuery(size)}`,
           {
             headers: {
               'Authorization': `Bearer ${localStorage.getItem('access_token')}`
@@ -46,7 +52,7 @@ export const SecureHeatmap = forwardRef<HTMLImageElement, SecureImageProps>(({ s
     return () => {
       if (objectUrl) URL.revokeObjectURL(objectUrl);
     };
-  }, [sessionId]);
+  }, [sessionId, size]);
 
   if (loading) return <Skeleton className={className} />;
   if (error) return <div className={`${className} flex items-center justify-center bg-white/5`}><ImageIcon className="text-gray-600 w-4 h-4" /></div>;
@@ -55,7 +61,7 @@ export const SecureHeatmap = forwardRef<HTMLImageElement, SecureImageProps>(({ s
   }
 );
 
-export const SecureImageModel = forwardRef<HTMLImageElement, { modelId: number; className?: string; alt?: string; ref?: React.Ref<HTMLImageElement> }>(({ modelId, className, alt }, ref) => {
+export const SecureImageModel = forwardRef<HTMLImageElement, { modelId: number; className?: string; alt?: string; size?: PreviewSize; ref?: React.Ref<HTMLImageElement> }>(({ modelId, className, alt, size }, ref) => {
   const [imgUrl, setImgUrl] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(false);
@@ -67,7 +73,7 @@ export const SecureImageModel = forwardRef<HTMLImageElement, { modelId: number;
       try {
         setLoading(true);
         const response = await fetch(
-          `${API_URL}/model/file/${modelId}`,
+          `${API_URL}/model/file/${modelId}${previewQuery(size)}`,
           {
             headers: {
               'Authorization': `Bearer ${localStorage.getItem('access_token')}`
@@ -92,7 +98,7 @@ export const SecureImageModel = forwardRef<HTMLImageElement, { modelId: number;
     return () => {
       if (objectUrl) URL.revokeObjectURL(objectUrl);
     };
-  }, [modelId]);
+  }, [modelId, size]);
 
   if (loading) return <Skeleton className={className} />;
   if (error) return <div className={`${className} flex items-center justify-center bg-white/5`}><ImageIcon className="text-gray-600 w-4 h-4" /></div>;
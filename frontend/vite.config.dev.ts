@@ -23,6 +23,7 @@ export default defineConfig(( { mode } ) => {
           target: 'http://127.0.0.1:8000', // Use IP instead of localhost
           changeOrigin: true,
           secure: false,
+          ws: true,
         }
       },
     },